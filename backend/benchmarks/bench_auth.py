@@ -0,0 +1,63 @@
+"""
+Benchmark: authenticated request throughput with and without the get_current_user cache.
+Run from the backend directory: python -m benchmarks.bench_auth
+
+Calls GET /api/auth/me and GET /api/categories/ in-process (TestClient) against
+a throwaway SQLite DB, first with routers.auth.user_cache disabled, then
+enabled, and counts the users-table SELECTs each run issued.
+"""
+import os
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench_auth.db"
+
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+
+NUM_REQUESTS = 2000
+ENDPOINTS = ("/api/auth/me", "/api/categories/")
+
+
+def bench(client, headers, user_cache, enabled, user_selects):
+    user_cache.clear()
+    user_cache.maxsize = 1024 if enabled else 0
+    for url in ENDPOINTS:
+        client.get(url, headers=headers).raise_for_status()
+    results = {}
+    for url in ENDPOINTS:
+        user_selects[0] = 0
+        start = time.perf_counter()
+        for _ in range(NUM_REQUESTS):
+            client.get(url, headers=headers).raise_for_status()
+        elapsed = time.perf_counter() - start
+        results[url] = (NUM_REQUESTS / elapsed, user_selects[0])
+    return results
+
+
+if __name__ == "__main__":
+    import main
+    from database import engine
+    from routers.auth import user_cache
+
+    user_selects = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_user_selects(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+            user_selects[0] += 1
+
+    with TestClient(main.app) as client:
+        token = client.post("/api/auth/signup", json={
+            "name": "Bench", "email": "bench@test.com", "password": "password"
+        }).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        uncached = bench(client, headers, user_cache, False, user_selects)
+        cached = bench(client, headers, user_cache, True, user_selects)
+
+    print(f"{NUM_REQUESTS:,} requests per endpoint")
+    for url in ENDPOINTS:
+        (slow, slow_selects), (fast, fast_selects) = uncached[url], cached[url]
+        print(f"{url:<18} | no cache {slow:7.0f} req/s ({slow_selects} user SELECTs) | "
+              f"cache {fast:7.0f} req/s ({fast_selects} user SELECTs) | {fast / slow:4.2f}x")
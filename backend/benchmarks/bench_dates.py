@@ -0,0 +1,63 @@
+"""
+Benchmark: DateParser vs. the previous strptime-loop parse_date on 1M statement dates.
+Run from the backend directory: python -m benchmarks.bench_dates
+"""
+import random
+import re
+import time
+from datetime import datetime
+
+from utils.dateparse import DateParser
+
+NUM_DATES = 1_000_000
+
+
+def legacy_parse_date(date_str):
+    """parse_date as it was before DateParser, for comparison."""
+    if not isinstance(date_str, str):
+        return None
+    date_str = date_str.strip()
+    formats = ['%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y-%m-%d', '%d-%b-%Y', '%-d/%-m/%Y', '%-d-%-m-%Y']
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    try:
+        parts = re.split(r'[./-]', date_str)
+        if len(parts) == 3:
+            day, month, year = parts
+            return datetime(int(year), int(month), int(day))
+    except:
+        pass
+    return None
+
+
+def make_dates(fmt, n, rng):
+    # A year of statement dates, each repeated many times as in a real statement
+    days = [datetime(2025, 1, 1).toordinal() + i for i in range(365)]
+    return [datetime.fromordinal(rng.choice(days)).strftime(fmt) for _ in range(n)]
+
+
+def bench(fmt):
+    rng = random.Random(0)
+    dates = make_dates(fmt, NUM_DATES, rng)
+
+    start = time.perf_counter()
+    expected = [legacy_parse_date(d) for d in dates]
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    date_parser = DateParser.sniff(dates)
+    got = [date_parser.parse(d) for d in dates]
+    fast = time.perf_counter() - start
+
+    assert got == expected
+    print(f"{fmt:<9} | legacy {legacy:6.2f} s | DateParser {fast:6.2f} s | "
+          f"{legacy / fast:5.1f}x | detected {date_parser.preferred}")
+
+
+if __name__ == "__main__":
+    print(f"Parsing {NUM_DATES:,} dates")
+    for fmt in ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%d-%b-%Y"):
+        bench(fmt)
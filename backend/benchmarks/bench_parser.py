@@ -0,0 +1,222 @@
+"""
+Benchmark: statement parsers on synthetic ICICI statements of increasing size.
+
+Times parse_pdf, parse_csv and _parse_text_lines_icici on inputs from
+benchmarks.synthetic (multi-line remarks, page-spanning transactions, noise
+lines), each case in a fresh subprocess, and reports rows/s, time per stage
+(table extraction, text extraction, CSV reading, line parsing, hashing) and the
+peak RSS rise during the parse. Results are written as JSON so runs can be
+compared.
+
+Run from the backend directory:
+    python -m benchmarks.bench_parser                   # 1-100 pages, 1k-100k rows
+    python -m benchmarks.bench_parser --full            # adds 1,000 pages and 1M rows
+    python -m benchmarks.bench_parser --compare benchmarks/results/<earlier>.json
+
+PDFs are parsed with workers=1 so every stage is timed in one process.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks import synthetic
+
+PDF_PAGES = (1, 10, 100)
+PDF_PAGES_FULL = PDF_PAGES + (1000,)
+ROWS = (1_000, 10_000, 100_000)
+ROWS_FULL = ROWS + (1_000_000,)
+ROWS_PER_PAGE = 15
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+class StageTimer:
+    """Exclusive wall time per stage: time spent in a nested stage is not also
+    charged to the stage around it."""
+
+    def __init__(self):
+        self.seconds = {}
+        self._stack = []
+
+    def wrap(self, owner, attr, stage):
+        original = getattr(owner, attr)
+
+        def timed(*args, **kwargs):
+            self._stack.append([stage, 0.0])
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                _, nested = self._stack.pop()
+                self.seconds[stage] = self.seconds.get(stage, 0.0) + elapsed - nested
+                if self._stack:
+                    self._stack[-1][1] += elapsed
+
+        setattr(owner, attr, timed)
+
+
+def _child(kind, path):
+    """Parse one input and print a JSON line with the count, timings and RSS rise."""
+    import pdfplumber.page
+    from pandas.io.parsers.readers import TextFileReader
+    from utils import parser
+
+    timer = StageTimer()
+    timer.wrap(parser, "_extract_pdf_table_transactions", "table extraction")
+    timer.wrap(pdfplumber.page.Page, "extract_text", "text extraction")
+    timer.wrap(parser, "_parse_icici_pdf_text", "line parsing")
+    timer.wrap(TextFileReader, "__next__", "csv read")
+    timer.wrap(parser, "_csv_frame_to_transactions", "line parsing")
+    timer.wrap(parser, "_parse_text_lines_icici", "line parsing")
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if kind == "pdf":
+        transactions = parser.parse_pdf(path, workers=1)
+    elif kind == "csv":
+        transactions = parser.parse_csv(path)
+    else:
+        with open(path, encoding="utf-8", errors="ignore") as lines:
+            transactions = parser._parse_text_lines_icici(lines)
+    parse_seconds = time.perf_counter() - start
+    peak_rise = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+
+    # Hashing happens at import (crud.ingest_transactions), once per parsed row
+    start = time.perf_counter()
+    for txn in transactions:
+        parser.generate_transaction_hash(txn["date"], txn["description"], txn["amount"])
+    hash_seconds = time.perf_counter() - start
+
+    stages = dict(timer.seconds)
+    stages["other"] = max(parse_seconds - sum(stages.values()), 0.0)
+    stages["hashing"] = hash_seconds
+    print(json.dumps({
+        "transactions": len(transactions),
+        "parse_seconds": parse_seconds,
+        "stages": {name: round(seconds, 4) for name, seconds in stages.items()},
+        "peak_rss_rise_mb": round(peak_rise / 1024, 1),  # ru_maxrss is in KB on Linux
+    }))
+
+
+def _write_input(kind, size, path):
+    if kind == "pdf":
+        with open(path, "wb") as f:
+            f.write(synthetic.make_icici_pdf(size, rows_per_page=ROWS_PER_PAGE))
+        return size * ROWS_PER_PAGE
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if kind == "csv":
+            synthetic.write_icici_csv(f, size)
+            return size
+        synthetic.write_icici_text(f, size)
+    return synthetic.icici_debit_count(size)
+
+
+def run_case(kind, size, workdir):
+    path = os.path.join(workdir, f"statement-{kind}-{size}.{'txt' if kind == 'text' else kind}")
+    expected = _write_input(kind, size, path)
+    try:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_parser", "--child", kind, path],
+            capture_output=True, text=True, check=True
+        ).stdout
+        file_mb = os.path.getsize(path) / (1024 * 1024)
+    finally:
+        os.remove(path)
+    result = json.loads(out.strip().splitlines()[-1])
+    total = result["parse_seconds"] + result["stages"]["hashing"]
+    result.update({
+        "kind": kind,
+        "size": size,
+        "unit": "pages" if kind == "pdf" else "rows",
+        "file_mb": round(file_mb, 2),
+        "expected_transactions": expected,
+        "rows_per_second": round(result["transactions"] / total) if total else None,
+        "parse_seconds": round(result["parse_seconds"], 4),
+    })
+    return result
+
+
+def case_key(result):
+    return f"{result['kind']}:{result['size']}"
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _versions():
+    import pandas
+    import pdfplumber
+    return {"python": platform.python_version(), "pdfplumber": pdfplumber.__version__, "pandas": pandas.__version__}
+
+
+def print_result(result, baseline=None):
+    stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in result["stages"].items() if seconds >= 0.005)
+    line = (f"{result['kind']:<4} {result['size']:>9,} {result['unit']:<5} | {result['transactions']:>9,} txns | "
+            f"{result['rows_per_second']:>9,} rows/s | peak +{result['peak_rss_rise_mb']:>6.1f} MB | {stages}")
+    if baseline and baseline.get("rows_per_second"):
+        line += (f" | {result['rows_per_second'] / baseline['rows_per_second']:.2f}x rows/s, "
+                 f"{result['peak_rss_rise_mb'] - baseline['peak_rss_rise_mb']:+.1f} MB vs baseline")
+    print(line)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--full", action="store_true", help="include 1,000-page PDFs and 1M-row CSV/text")
+    ap.add_argument("--kinds", default="pdf,csv,text", help="comma-separated subset of pdf,csv,text")
+    ap.add_argument("--out", help="results file (default: benchmarks/results/parser-<timestamp>.json)")
+    ap.add_argument("--compare", help="earlier results file to compare against")
+    args = ap.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {case_key(r): r for r in json.load(f)["results"]}
+
+    sizes = {
+        "pdf": PDF_PAGES_FULL if args.full else PDF_PAGES,
+        "csv": ROWS_FULL if args.full else ROWS,
+        "text": ROWS_FULL if args.full else ROWS,
+    }
+    results = []
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="bench-parser-") as workdir:
+        for kind in args.kinds.split(","):
+            for size in sizes[kind]:
+                result = run_case(kind, size, workdir)
+                print_result(result, baseline.get(case_key(result)))
+                if result["transactions"] != result["expected_transactions"]:
+                    print(f"  FAIL: expected {result['expected_transactions']:,} transactions")
+                    failed = True
+                results.append(result)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"parser-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "versions": _versions(),
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {out}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        _child(sys.argv[2], sys.argv[3])
+    else:
+        main()
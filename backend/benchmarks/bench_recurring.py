@@ -0,0 +1,155 @@
+"""
+Benchmark: detect_recurring_expenses on an account with 500k expenses, comparing
+the original per-row ORM loop, the incremental detector's first run (a full
+scan of the history) and its next run after NEW_EXPENSES more rows arrive,
+which should cost in proportion to the new rows only.
+Run from the backend directory: python -m benchmarks.bench_recurring
+
+Each run happens in a fresh subprocess against its own SQLite DB, so the peak
+RSS rise is measured separately for each.
+"""
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import crud
+import models
+from database import Base
+
+NUM_EXPENSES = 500_000
+NEW_EXPENSES = 1_000
+MERCHANTS = ["SWIGGY", "ZOMATO", "NETFLIX", "SPOTIFY", "UBER", "AIRTEL", "BIGBASKET", "RENT", "AMAZON"]
+
+
+LEGACY_KEYWORDS = [
+    'netflix', 'spotify', 'youtube', 'amazon prime', 'hotstar', 'disney',
+    'jio', 'airtel', 'vi ', 'bsnl', 'subscription', 'premium',
+    'apple', 'google one', 'icloud', 'microsoft', 'adobe',
+    'gym', 'membership', 'insurance', 'emi', 'sip',
+    'electricity', 'water bill', 'gas bill', 'internet', 'broadband',
+    'rent', 'maintenance'
+]
+
+
+def legacy_detect_recurring_expenses(db, user_id):
+    """detect_recurring_expenses as originally written (keywords, or the exact
+    description 3+ times in 90 days), for comparison."""
+    from sqlalchemy import func
+    cutoff = datetime.utcnow() - timedelta(days=90)
+    recurring_descs = {r.description for r in db.query(
+        models.Expense.description, func.count(models.Expense.id).label('count')
+    ).filter(
+        models.Expense.user_id == user_id, models.Expense.date >= cutoff
+    ).group_by(models.Expense.description).having(func.count(models.Expense.id) >= 3).all()}
+    all_expenses = db.query(models.Expense).filter(
+        models.Expense.user_id == user_id, models.Expense.date >= cutoff
+    ).all()
+    updated_count = 0
+    for expense in all_expenses:
+        desc_lower = expense.description.lower()
+        should_be_recurring = any(kw in desc_lower for kw in LEGACY_KEYWORDS) or expense.description in recurring_descs
+        if expense.is_recurring != should_be_recurring:
+            expense.is_recurring = should_be_recurring
+            updated_count += 1
+    db.commit()
+    return {"updated": updated_count}
+
+
+def expense_rows(user_id, start, count, rng):
+    now = datetime.utcnow()
+    for i in range(start, start + count):
+        merchant = rng.choice(MERCHANTS)
+        # Most descriptions are unique (per-transaction refs); some repeat exactly
+        ref = rng.randrange(10**9) if rng.random() < 0.8 else i % 500
+        yield {
+            "date": now - timedelta(minutes=rng.randrange(89 * 24 * 60)),
+            "description": f"UPI/{merchant}/{ref}/Payment",
+            "amount": round(rng.uniform(10, 2000), 2),
+            "source": "ICICI PDF",
+            "transaction_hash": f"h{i}",
+            "user_id": user_id,
+            "is_recurring": False,
+        }
+
+
+def insert_expenses(path, user_id, start, count, seed_value):
+    engine = create_engine(f"sqlite:///{path}")
+    db = sessionmaker(bind=engine)()
+    rows = []
+    for row in expense_rows(user_id, start, count, random.Random(seed_value)):
+        rows.append(row)
+        if len(rows) == 10_000:
+            db.execute(insert(models.Expense), rows)
+            rows = []
+    if rows:
+        db.execute(insert(models.Expense), rows)
+    db.commit()
+    db.close()
+
+
+def seed(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    user = models.User(email="bench@test.com", name="Bench")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+    insert_expenses(path, user_id, 0, NUM_EXPENSES, 0)
+    return user_id
+
+
+def child(which, path, user_id):
+    engine = create_engine(f"sqlite:///{path}")
+    db = sessionmaker(bind=engine)()
+    fn = legacy_detect_recurring_expenses if which == "legacy" else crud.detect_recurring_expenses
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    result = fn(db, user_id)
+    elapsed = time.perf_counter() - start
+    rise = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    print(result["updated"], result.get("scanned", -1), elapsed, rise)
+
+
+def run(which, path, user_id):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_recurring", "--child", which, path, str(user_id)],
+        capture_output=True, text=True, check=True
+    ).stdout.split()
+    return int(out[-4]), int(out[-3]), float(out[-2]), int(out[-1]) / 1024
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        sys.exit(0)
+    workdir = tempfile.mkdtemp()
+    try:
+        base = os.path.join(workdir, "base.db")
+        print(f"Seeding {NUM_EXPENSES:,} expenses")
+        user_id = seed(base)
+        legacy_path = os.path.join(workdir, "legacy.db")
+        path = os.path.join(workdir, "incremental.db")
+        shutil.copy(base, legacy_path)
+        shutil.copy(base, path)
+        results = {"legacy": run("legacy", legacy_path, user_id), "full": run("full", path, user_id)}
+        # The detector's state now covers the whole history; add a day's worth of imports
+        insert_expenses(path, user_id, NUM_EXPENSES, NEW_EXPENSES, 1)
+        results["incremental"] = run("incremental", path, user_id)
+        for which, (updated, scanned, elapsed, rise_mb) in results.items():
+            scanned = f"{scanned:,}" if scanned >= 0 else "all"
+            print(f"{which:<11} | {elapsed:7.3f} s | peak RSS +{rise_mb:7.1f} MB | scanned {scanned:>8} | updated {updated:,}")
+        print(f"first run vs legacy: {results['legacy'][2] / results['full'][2]:.1f}x; "
+              f"incremental vs legacy: {results['legacy'][2] / results['incremental'][2]:.0f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,176 @@
+"""
+Synthetic ICICI statements for benchmarks and memory checks.
+
+make_icici_pdf() writes a plain text-layout PDF (no dependencies) whose lines
+look like the real "OpTransactionHistory" export: header/noise lines, then per
+transaction a UPI/NEFT head line, the "S.No date amount balance" anchor line
+and a reference continuation line, so parse_pdf() takes its text path. Some
+remarks run to an extra line, transactions flow across page breaks and every
+page carries the bank's footer noise.
+
+make_icici_csv() and make_icici_text() write the same transactions as the
+detailed CSV export and as a plain-text statement.
+"""
+import io
+import random
+from datetime import datetime, timedelta
+
+HEADS = ("UPI", "NEFT", "IMPS", "ATM", "POS", "BIL")
+MERCHANTS = ("SWIGGY", "ZOMATO", "AMAZON", "JIOMART", "UBER", "OLA", "BIGBASKET",
+             "NETFLIX", "AIRTEL", "BESCOM", "IRCTC", "FLIPKART", "MYNTRA", "PHARMEASY")
+PAGE_HEADER = (
+    "Statement of Transactions in Savings Account Number: 000000000000",
+    "Transaction Withdrawal Deposit Balance",
+    "S No. Cheque Number Transaction Remarks",
+    "Date Amount (INR) Amount (INR) (INR)",
+)
+PAGE_FOOTER = (
+    "www.icici.bank.in",
+    "Never share your OTP, PIN or password with anyone",
+)
+CSV_HEADER = ("S No.,Value Date,Transaction Date,Cheque Number,Transaction Remarks,"
+              "Withdrawal Amount (INR ),Deposit Amount (INR ),Balance (INR )")
+CSV_FOOTER = (
+    "Legends for transactions in your account statement",
+    "Sincerly",
+    "Team ICICI Bank",
+)
+# Every MULTILINE_EVERY-th transaction has a second remarks line
+MULTILINE_EVERY = 5
+PAGE_WIDTH = 595
+LINE_HEIGHT = 12
+PAGE_MARGIN = 40
+
+
+def icici_transactions(num_rows: int, seed: int = 0, start: datetime = datetime(2025, 1, 1)):
+    """Yield (serial, date, head line, reference line, amount, balance, is_credit) rows
+    with a running balance."""
+    rng = random.Random(seed)
+    balance = 250000.0
+    for i in range(num_rows):
+        date = start + timedelta(days=i * 365 // max(num_rows, 1))
+        merchant = rng.choice(MERCHANTS)
+        amount = round(rng.uniform(5, 5000), 2)
+        # Statements never show a negative balance; top up before it would go below zero
+        credit = rng.random() < 0.1 or balance - amount < 1000
+        balance = round(balance + amount if credit else balance - amount, 2)
+        head = f"{rng.choice(HEADS)}/{merchant}/{merchant.lower()}{i % 97}@ybl/Payment fr/YES BANK"
+        ref = f"L/{rng.randrange(10**11, 10**12)}/IBL{rng.getrandbits(64):016x}"
+        yield i + 1, date, head, ref, amount, balance, credit
+
+
+def _remarks_extra(serial: int) -> str:
+    return f"Order ref {serial:08d} settled" if serial % MULTILINE_EVERY == 0 else None
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(lines, height):
+    parts = ["BT", "/F1 9 Tf", f"{LINE_HEIGHT} TL", f"36 {height - PAGE_MARGIN} Td"]
+    for line in lines:
+        parts.append(f"({_pdf_escape(line)}) Tj T*")
+    parts.append("ET")
+    return "\n".join(parts).encode("latin-1")
+
+
+def make_icici_pdf(num_pages: int, rows_per_page: int = 15, seed: int = 0) -> bytes:
+    """An ICICI-style statement of `num_pages` pages holding `num_pages * rows_per_page`
+    transactions. Lines are split evenly across pages, so transactions straddle
+    page breaks."""
+    body = []
+    for serial, date, head, ref, amount, balance, _ in icici_transactions(num_pages * rows_per_page, seed):
+        body.append(head)
+        body.append(f"{serial} {date:%d.%m.%Y} {amount:.2f} {balance:.2f}")
+        body.append(ref)
+        extra = _remarks_extra(serial)
+        if extra:
+            body.append(extra)
+    per_page = -(-len(body) // max(num_pages, 1))
+    streams = []
+    height = 0
+    for page in range(num_pages):
+        lines = list(PAGE_HEADER) + body[page * per_page:(page + 1) * per_page] + list(PAGE_FOOTER) + [str(page + 1)]
+        height = max(842, 2 * PAGE_MARGIN + len(lines) * LINE_HEIGHT)
+        streams.append((_page_stream(lines, height), height))
+
+    # Object layout: 1 catalog, 2 pages tree, 3 font, then (page, content) pairs
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for stream, height in streams:
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {height}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _money(value: float, rng) -> str:
+    # The export writes some amounts with thousands separators, quoted
+    return f'"{value:,.2f}"' if value >= 1000 and rng.random() < 0.5 else f"{value:.2f}"
+
+
+def write_icici_csv(out, num_rows: int, seed: int = 0):
+    """Write the detailed CSV export to a text file object, one transaction per row.
+    Every debit and credit row parses to one transaction."""
+    rng = random.Random(seed + 1)
+    out.write(CSV_HEADER + "\n")
+    for serial, date, head, ref, amount, balance, credit in icici_transactions(num_rows, seed):
+        remarks = f"{head}/{ref}"
+        extra = _remarks_extra(serial)
+        if extra:
+            remarks = f'"{remarks}\n{extra}"'
+        withdrawal, deposit = ("0.00", _money(amount, rng)) if credit else (_money(amount, rng), "0.00")
+        out.write(f"{serial},{date:%d/%m/%Y},{date:%d/%m/%Y},-,{remarks},{withdrawal},{deposit},{_money(balance, rng)}\n")
+    out.write("\n" + "\n".join(CSV_FOOTER) + "\n")
+
+
+def write_icici_text(out, num_rows: int, seed: int = 0):
+    """Write a plain-text statement (DATE MODE PARTICULARS DEPOSITS WITHDRAWALS BALANCE,
+    two-space separated) with continuation and noise lines. Only debits parse, as
+    with _parse_text_lines_icici."""
+    out.write("ICICI Bank Savings Account statement\n")
+    out.write("DATE  MODE  PARTICULARS  DEPOSITS  WITHDRAWALS  BALANCE\n")
+    for serial, date, head, ref, amount, balance, credit in icici_transactions(num_rows, seed):
+        mode, particulars = head.split("/", 1)
+        deposit, withdrawal = (amount, 0.0) if credit else (0.0, amount)
+        out.write(f"{date:%d-%m-%Y}  {mode}  {particulars}  {deposit:.2f}  {withdrawal:.2f}  {balance:.2f}\n")
+        out.write(f"    {ref}\n")
+        if serial % 50 == 0:
+            out.write("Page total carried forward\n")
+
+
+def icici_debit_count(num_rows: int, seed: int = 0) -> int:
+    return sum(1 for row in icici_transactions(num_rows, seed) if not row[-1])
+
+
+def make_icici_csv(num_rows: int, seed: int = 0) -> bytes:
+    out = io.StringIO()
+    write_icici_csv(out, num_rows, seed)
+    return out.getvalue().encode()
+
+
+def make_icici_text(num_rows: int, seed: int = 0) -> bytes:
+    out = io.StringIO()
+    write_icici_text(out, num_rows, seed)
+    return out.getvalue().encode()
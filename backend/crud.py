@@ -1,8 +1,12 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, insert, update, case, or_, tuple_
 from fastapi import HTTPException
-import models, schemas
+import models, schemas, search, recurring
+from utils.autotag import matcher_cache
+from utils.category_cache import category_cache
 from datetime import datetime, timedelta
+import base64
+import json
 
 # ──────────────────────────────────────
 # EXPENSES
@@ -14,14 +18,118 @@ def get_expense_by_hash(db: Session, transaction_hash: str, user_id: int):
 def create_expense(db: Session, expense: schemas.ExpenseCreate, user_id: int):
     db_expense = models.Expense(**expense.dict(), user_id=user_id)
     db.add(db_expense)
+    _update_summary(db, user_id, spent=db_expense.amount or 0.0,
+                    reimbursed=db_expense.reimbursed_amount or 0.0, expenses=1)
+    _update_rollups(db, user_id, _rollup_deltas(added=[_rollup_snapshot(db_expense)]))
     db.commit()
     db.refresh(db_expense)
     return db_expense
 
-def get_expenses(
+# Rows per INSERT / IN (...) chunk; keeps bound parameters under SQLite's limit.
+INGEST_BATCH_SIZE = 500
+
+def _dialect_insert(db: Session, table, conflict_columns=("transaction_hash", "user_id")):
+    """INSERT that skips rows hitting the unique constraint on `conflict_columns`
+    (by default uix_expense_hash_user) instead of raising."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(table).on_conflict_do_nothing(index_elements=list(conflict_columns))
+    if dialect == "sqlite":
+        return insert(table).prefix_with("OR IGNORE")
+    return insert(table)
+
+def get_existing_hashes(db: Session, hashes, user_id: int):
+    """Return the subset of `hashes` the user already has, one IN query per chunk."""
+    hashes = list(hashes)
+    existing = set()
+    for i in range(0, len(hashes), INGEST_BATCH_SIZE):
+        chunk = hashes[i:i + INGEST_BATCH_SIZE]
+        rows = db.query(models.Expense.transaction_hash).filter(
+            models.Expense.user_id == user_id,
+            models.Expense.transaction_hash.in_(chunk)
+        ).all()
+        existing.update(r.transaction_hash for r in rows)
+    return existing
+
+def ingest_transactions(db: Session, transactions: list, user_id: int):
+    """Bulk-import parsed statement transactions in a single DB transaction.
+
+    Hashes are computed up front and resolved against the DB in one set-based
+    query; duplicates already stored or repeated inside the file count as
+    `existing`. New rows are auto-tagged in memory and inserted in batches.
+    """
+    from utils.parser import generate_transaction_hash
+
+    matcher = get_auto_tag_matcher(db, user_id)
+    candidates = []
+    for txn in transactions:
+        try:
+            txn_hash = generate_transaction_hash(txn["date"], txn["description"], txn["amount"])
+            candidates.append(schemas.ExpenseCreate(**txn, transaction_hash=txn_hash))
+        except Exception as e:
+            print(f"Error processing transaction: {e}, Transaction: {txn}")
+
+    existing_hashes = get_existing_hashes(db, {c.transaction_hash for c in candidates}, user_id)
+    now = datetime.utcnow()
+    rows = []
+    seen = set(existing_hashes)
+    for c in candidates:
+        if c.transaction_hash in seen:
+            continue
+        seen.add(c.transaction_hash)
+        row = c.dict()
+        if not row["category_id"]:
+            row["category_id"] = matcher.match(row["description"])
+        row.update(user_id=user_id, is_recurring=False, created_at=now)
+        rows.append(row)
+
+    new_added = 0
+    stmt = _dialect_insert(db, models.Expense.__table__)
+    for i in range(0, len(rows), INGEST_BATCH_SIZE):
+        chunk = rows[i:i + INGEST_BATCH_SIZE]
+        new_added += db.execute(stmt, chunk).rowcount
+    if new_added == len(rows):
+        _update_summary(db, user_id, spent=sum(r["amount"] or 0.0 for r in rows),
+                        reimbursed=sum(r["reimbursed_amount"] or 0.0 for r in rows), expenses=new_added)
+        _update_rollups(db, user_id, _rollup_deltas(added=[_rollup_snapshot(r) for r in rows]))
+    else:
+        # A concurrent upload won some conflicts; we don't know which rows landed
+        rebuild_user_summary(db, user_id)
+        rebuild_user_rollups(db, user_id)
+    db.commit()
+
+    return {
+        "existing": len(candidates) - new_added,
+        "new_added": new_added,
+        "auto_tagged": sum(1 for r in rows if r["category_id"]),
+    }
+
+def ingest_transaction_batches(db: Session, batches, user_id: int, progress=None):
+    """ingest_transactions() for a stream of batches (e.g. parser.iter_csv_batches),
+    committing each one as it arrives so memory and time to first insert don't
+    depend on the file size. Rows repeated from an earlier batch count as
+    `existing`, as they would within one batch. ``progress(totals)`` runs after
+    every batch."""
+    totals = {"existing": 0, "new_added": 0, "auto_tagged": 0}
+    for batch in batches:
+        result = ingest_transactions(db, batch, user_id=user_id)
+        for key in totals:
+            totals[key] += result[key]
+        if progress:
+            progress(totals)
+    return totals
+
+EXPENSE_SORT_COLUMNS = {
+    "date": models.Expense.date,
+    "amount": models.Expense.amount,
+    "created_at": models.Expense.created_at,
+    "description": models.Expense.description,
+}
+
+def _filtered_expenses_query(
     db: Session,
-    skip: int = 0,
-    limit: int = 100,
+    user_id: int,
     q: str = None,
     status: models.ExpenseStatus = None,
     source: str = None,
@@ -29,15 +137,13 @@ def get_expenses(
     max_amount: float = None,
     from_date: datetime = None,
     to_date: datetime = None,
-    sort_by: str = "date",
-    order: str = "desc",
-    user_id: int = None,
     category_id: int = None,
     is_recurring: bool = None
 ):
+    """Base expense query with every list/export filter applied."""
     query = db.query(models.Expense).filter(models.Expense.user_id == user_id)
     if q:
-        query = query.filter(models.Expense.description.ilike(f"%{q}%"))
+        query = search.filter_description(query, db, q)
     if status:
         query = query.filter(models.Expense.status == status)
     if source:
@@ -54,16 +160,41 @@ def get_expenses(
         query = query.filter(models.Expense.category_id == category_id)
     if is_recurring is not None:
         query = query.filter(models.Expense.is_recurring == is_recurring)
-    sort_col = {
-        "date": models.Expense.date,
-        "amount": models.Expense.amount,
-        "created_at": models.Expense.created_at,
-        "description": models.Expense.description,
-    }.get(sort_by, models.Expense.date)
+    return query
+
+def _order_expenses(query, db: Session, sort_by: str, order: str, q: str = None):
+    # "relevance" only means something for a search; otherwise it falls back to date
+    if sort_by == "relevance" and q:
+        return search.order_by_relevance(query, db, q)
+    sort_col = EXPENSE_SORT_COLUMNS.get(sort_by, models.Expense.date)
     if order.lower() == "asc":
-        query = query.order_by(sort_col.asc())
-    else:
-        query = query.order_by(sort_col.desc())
+        return query.order_by(sort_col.asc())
+    return query.order_by(sort_col.desc())
+
+def get_expenses(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    q: str = None,
+    status: models.ExpenseStatus = None,
+    source: str = None,
+    min_amount: float = None,
+    max_amount: float = None,
+    from_date: datetime = None,
+    to_date: datetime = None,
+    sort_by: str = "date",
+    order: str = "desc",
+    user_id: int = None,
+    category_id: int = None,
+    is_recurring: bool = None
+):
+    query = _filtered_expenses_query(
+        db, user_id, q=q, status=status, source=source,
+        min_amount=min_amount, max_amount=max_amount,
+        from_date=from_date, to_date=to_date,
+        category_id=category_id, is_recurring=is_recurring
+    )
+    query = _order_expenses(query, db, sort_by, order, q)
     return query.offset(skip).limit(limit).all()
 
 def get_expenses_paginated(
@@ -81,49 +212,170 @@ def get_expenses_paginated(
     order: str = "desc",
     user_id: int = None,
     category_id: int = None,
-    is_recurring: bool = None
+    is_recurring: bool = None,
+    include_total: bool = True
 ):
     """Return paginated expenses with total count."""
-    query = db.query(models.Expense).filter(models.Expense.user_id == user_id)
-    if q:
-        query = query.filter(models.Expense.description.ilike(f"%{q}%"))
-    if status:
-        query = query.filter(models.Expense.status == status)
-    if source:
-        query = query.filter(models.Expense.source == source)
-    if min_amount is not None:
-        query = query.filter(models.Expense.amount >= min_amount)
-    if max_amount is not None:
-        query = query.filter(models.Expense.amount <= max_amount)
-    if from_date:
-        query = query.filter(models.Expense.date >= from_date)
-    if to_date:
-        query = query.filter(models.Expense.date <= to_date)
-    if category_id is not None:
-        query = query.filter(models.Expense.category_id == category_id)
-    if is_recurring is not None:
-        query = query.filter(models.Expense.is_recurring == is_recurring)
+    query = _filtered_expenses_query(
+        db, user_id, q=q, status=status, source=source,
+        min_amount=min_amount, max_amount=max_amount,
+        from_date=from_date, to_date=to_date,
+        category_id=category_id, is_recurring=is_recurring
+    )
 
-    total = query.count()
+    total = query.count() if include_total else None
 
-    sort_col = {
-        "date": models.Expense.date,
-        "amount": models.Expense.amount,
-        "created_at": models.Expense.created_at,
-        "description": models.Expense.description,
-    }.get(sort_by, models.Expense.date)
-    if order.lower() == "asc":
-        query = query.order_by(sort_col.asc())
-    else:
-        query = query.order_by(sort_col.desc())
+    query = _order_expenses(query, db, sort_by, order, q)
 
     import math
     skip = (page - 1) * per_page
     items = query.offset(skip).limit(per_page).all()
-    pages = math.ceil(total / per_page) if per_page > 0 else 1
+    pages = (math.ceil(total / per_page) if per_page > 0 else 1) if total is not None else None
 
     return {"items": items, "total": total, "page": page, "pages": pages, "per_page": per_page}
 
+def _encode_cursor(sort_by: str, order: str, value, expense_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort_by, "o": order, "v": value, "id": expense_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, sort_by: str, order: str):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if payload["s"] != sort_by or payload["o"] != order:
+            raise ValueError("cursor was issued for a different sort")
+        value = payload["v"]
+        if value is not None and sort_by in ("date", "created_at"):
+            value = datetime.fromisoformat(value)
+        return value, int(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+def _seek_past(query, sort_col, order: str, value, last_id: int):
+    """Keep only rows after (value, last_id) in (sort_col, id) order, NULL sort values last."""
+    id_col = models.Expense.id
+    ahead = (lambda a, b: a > b) if order == "asc" else (lambda a, b: a < b)
+    if value is None:
+        return query.filter(sort_col.is_(None), ahead(id_col, last_id))
+    return query.filter(or_(
+        ahead(tuple_(sort_col, id_col), tuple_(value, last_id)),
+        sort_col.is_(None)
+    ))
+
+def _keyset_order(query, sort_col, order: str):
+    id_col = models.Expense.id
+    if order == "asc":
+        return query.order_by(sort_col.asc().nullslast(), id_col.asc())
+    return query.order_by(sort_col.desc().nullslast(), id_col.desc())
+
+def get_expenses_keyset(
+    db: Session,
+    cursor: str = None,
+    per_page: int = 20,
+    q: str = None,
+    status: models.ExpenseStatus = None,
+    source: str = None,
+    min_amount: float = None,
+    max_amount: float = None,
+    from_date: datetime = None,
+    to_date: datetime = None,
+    sort_by: str = "date",
+    order: str = "desc",
+    user_id: int = None,
+    category_id: int = None,
+    is_recurring: bool = None,
+    include_total: bool = False
+):
+    """Cursor-paginated expenses ordered by (sort column, id), NULL sort values last.
+
+    `cursor` is the opaque `next_cursor` of the previous page (empty/None for
+    the first page); each page seeks past it instead of using OFFSET.
+    """
+    if sort_by not in EXPENSE_SORT_COLUMNS:
+        sort_by = "date"
+    order = "asc" if order.lower() == "asc" else "desc"
+    sort_col = EXPENSE_SORT_COLUMNS[sort_by]
+
+    query = _filtered_expenses_query(
+        db, user_id, q=q, status=status, source=source,
+        min_amount=min_amount, max_amount=max_amount,
+        from_date=from_date, to_date=to_date,
+        category_id=category_id, is_recurring=is_recurring
+    )
+    total = query.count() if include_total else None
+
+    if cursor:
+        value, last_id = _decode_cursor(cursor, sort_by, order)
+        query = _seek_past(query, sort_col, order, value, last_id)
+    query = _keyset_order(query, sort_col, order)
+
+    rows = query.limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page and items:
+        last = items[-1]
+        next_cursor = _encode_cursor(sort_by, order, getattr(last, sort_by), last.id)
+
+    return {"items": items, "total": total, "page": None, "pages": None, "per_page": per_page, "next_cursor": next_cursor}
+
+EXPORT_BATCH_SIZE = 1000
+
+def iter_expense_export_rows(
+    db: Session,
+    q: str = None,
+    status: models.ExpenseStatus = None,
+    source: str = None,
+    min_amount: float = None,
+    max_amount: float = None,
+    from_date: datetime = None,
+    to_date: datetime = None,
+    sort_by: str = "date",
+    order: str = "desc",
+    user_id: int = None,
+    category_id: int = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+):
+    """Yield batches of export rows (date, description, amount, status,
+    category name, is_recurring, source) for every matching expense.
+
+    Walks the result in keyset batches over plain columns, so memory stays
+    bounded by `batch_size` regardless of how many rows the user has.
+    """
+    if sort_by not in EXPENSE_SORT_COLUMNS:
+        sort_by = "date"
+    order = "asc" if (order or "").lower() == "asc" else "desc"
+    sort_col = EXPENSE_SORT_COLUMNS[sort_by]
+
+    base = _filtered_expenses_query(
+        db, user_id, q=q, status=status, source=source,
+        min_amount=min_amount, max_amount=max_amount,
+        from_date=from_date, to_date=to_date,
+        category_id=category_id
+    ).outerjoin(models.Category, models.Expense.category_id == models.Category.id).with_entities(
+        models.Expense.id,
+        sort_col.label("sort_key"),
+        models.Expense.date,
+        models.Expense.description,
+        models.Expense.amount,
+        models.Expense.status,
+        models.Category.name,
+        models.Expense.is_recurring,
+        models.Expense.source,
+    )
+    base = _keyset_order(base, sort_col, order)
+
+    last = None
+    while True:
+        query = base if last is None else _seek_past(base, sort_col, order, last.sort_key, last.id)
+        rows = query.limit(batch_size).all()
+        if not rows:
+            return
+        yield [tuple(r)[2:] for r in rows]
+        if len(rows) < batch_size:
+            return
+        last = rows[-1]
+
 def delete_expense(db: Session, expense_id: int, user_id: int):
     expense = db.query(models.Expense).filter(
         models.Expense.id == expense_id,
@@ -135,7 +387,12 @@ def delete_expense(db: Session, expense_id: int, user_id: int):
     db.query(models.ReimbursementCoverage).filter(
         models.ReimbursementCoverage.expense_id == expense_id
     ).delete()
+    merchant_key = expense.merchant_key
     db.delete(expense)
+    _update_summary(db, user_id, spent=-(expense.amount or 0.0),
+                    reimbursed=-(expense.reimbursed_amount or 0.0), expenses=-1)
+    _update_rollups(db, user_id, _rollup_deltas(removed=[_rollup_snapshot(expense)]))
+    recurring.refresh_merchants(db, user_id, [merchant_key])
     db.commit()
     return {"deleted": True}
 
@@ -151,8 +408,13 @@ def delete_expenses_bulk(db: Session, expense_ids: list, user_id: int):
     db.query(models.ReimbursementCoverage).filter(
         models.ReimbursementCoverage.expense_id.in_(deleted_ids)
     ).delete(synchronize_session=False)
+    merchant_keys = {e.merchant_key for e in expenses}
     for e in expenses:
         db.delete(e)
+    _update_summary(db, user_id, spent=-sum(e.amount or 0.0 for e in expenses),
+                    reimbursed=-sum(e.reimbursed_amount or 0.0 for e in expenses), expenses=-len(expenses))
+    _update_rollups(db, user_id, _rollup_deltas(removed=[_rollup_snapshot(e) for e in expenses]))
+    recurring.refresh_merchants(db, user_id, merchant_keys)
     db.commit()
     return {"deleted": len(deleted_ids), "ids": deleted_ids}
 
@@ -165,6 +427,9 @@ def delete_all_expenses(db: Session, user_id: int):
             models.ReimbursementCoverage.expense_id.in_(expense_ids)
         ).delete(synchronize_session=False)
     count = db.query(models.Expense).filter(models.Expense.user_id == user_id).delete(synchronize_session=False)
+    rebuild_user_summary(db, user_id)
+    rebuild_user_rollups(db, user_id)
+    recurring.reset(db, user_id)
     db.commit()
     return {"deleted": count}
 
@@ -176,60 +441,35 @@ def update_expense(db: Session, expense_id: int, data: schemas.ExpenseUpdate, us
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     update_data = data.dict(exclude_unset=True)
+    old_amount = expense.amount or 0.0
+    old_snapshot = _rollup_snapshot(expense)
+    old_merchant_key = expense.merchant_key
     for key, value in update_data.items():
         setattr(expense, key, value)
+    if (expense.amount or 0.0) != old_amount:
+        _update_summary(db, user_id, spent=(expense.amount or 0.0) - old_amount)
+    new_snapshot = _rollup_snapshot(expense)
+    if new_snapshot != old_snapshot:
+        _update_rollups(db, user_id, _rollup_deltas(added=[new_snapshot], removed=[old_snapshot]))
+    # Already folded into the recurring detector: move it to the merchant it belongs to now
+    if old_merchant_key is not None and update_data.keys() & {"description", "date", "amount"}:
+        recurring.refold_expense(db, user_id, expense, old_merchant_key)
+        if "is_recurring" in update_data:
+            # An explicit flag wins over the detector's
+            db.query(models.Expense).filter(models.Expense.id == expense.id).update(
+                {"is_recurring": update_data["is_recurring"]}, synchronize_session=False
+            )
     db.commit()
     db.refresh(expense)
     return expense
 
 def detect_recurring_expenses(db: Session, user_id: int):
-    """Detect recurring expenses: descriptions appearing >= 3 times in last 90 days."""
-    cutoff = datetime.utcnow() - timedelta(days=90)
-    
-    # Known subscription keywords
-    subscription_keywords = [
-        'netflix', 'spotify', 'youtube', 'amazon prime', 'hotstar', 'disney',
-        'jio', 'airtel', 'vi ', 'bsnl', 'subscription', 'premium',
-        'apple', 'google one', 'icloud', 'microsoft', 'adobe',
-        'gym', 'membership', 'insurance', 'emi', 'sip',
-        'electricity', 'water bill', 'gas bill', 'internet', 'broadband',
-        'rent', 'maintenance'
-    ]
-    
-    # Find descriptions with >= 3 occurrences in last 90 days
-    recurring_descriptions = db.query(
-        models.Expense.description,
-        func.count(models.Expense.id).label('count')
-    ).filter(
-        models.Expense.user_id == user_id,
-        models.Expense.date >= cutoff
-    ).group_by(
-        models.Expense.description
-    ).having(
-        func.count(models.Expense.id) >= 3
-    ).all()
-    
-    recurring_descs = {r.description for r in recurring_descriptions}
-    
-    # Also flag known subscription keywords
-    all_expenses = db.query(models.Expense).filter(
-        models.Expense.user_id == user_id,
-        models.Expense.date >= cutoff
-    ).all()
-    
-    updated_count = 0
-    for expense in all_expenses:
-        desc_lower = expense.description.lower()
-        is_sub = any(kw in desc_lower for kw in subscription_keywords)
-        is_freq = expense.description in recurring_descs
-        should_be_recurring = is_sub or is_freq
-        
-        if expense.is_recurring != should_be_recurring:
-            expense.is_recurring = should_be_recurring
-            updated_count += 1
-    
-    db.commit()
-    return {"updated": updated_count}
+    """Update recurring flags from the expenses added since the last run (see recurring.py):
+    merchants paid on a weekly, monthly or annual cadence, plus known subscriptions."""
+    return recurring.update_recurring(db, user_id)
+
+def get_recurring_merchants(db: Session, user_id: int):
+    return recurring.get_recurring_merchants(db, user_id)
 
 # ──────────────────────────────────────
 # CATEGORIES
@@ -313,25 +553,42 @@ def seed_default_categories(db: Session, user_id: int):
     existing = db.query(models.Category).filter(models.Category.user_id == user_id).count()
     if existing > 0:
         return
-    # Seed categories
-    for cat in DEFAULT_CATEGORIES:
-        db.add(models.Category(**cat, user_id=user_id))
-    db.commit()
+    _insert_default_categories(db, user_id)
 
-    # Seed auto-tag rules — map keywords to the just-created categories
-    cat_map = {c.name: c.id for c in db.query(models.Category).filter(models.Category.user_id == user_id).all()}
-    existing_rules = db.query(models.AutoTagRule).filter(models.AutoTagRule.user_id == user_id).count()
-    if existing_rules > 0:
-        return
-    for rule in DEFAULT_AUTO_TAG_RULES:
-        cat_id = cat_map.get(rule["category"])
-        if cat_id:
-            db.add(models.AutoTagRule(keyword=rule["keyword"], category_id=cat_id, user_id=user_id))
+def _insert_default_categories(db: Session, user_id: int):
+    """Bulk-insert the default categories and their auto-tag rules in one transaction.
+    Rows that already exist (e.g. seeded by a concurrent request) are skipped."""
+    db.execute(
+        _dialect_insert(db, models.Category.__table__, ("name", "user_id")),
+        [{**cat, "user_id": user_id} for cat in DEFAULT_CATEGORIES]
+    )
+    # Map keywords to the just-created categories
+    cat_map = dict(db.query(models.Category.name, models.Category.id).filter(models.Category.user_id == user_id).all())
+    existing_rules = db.query(models.AutoTagRule.id).filter(models.AutoTagRule.user_id == user_id).first()
+    rules = [
+        {"keyword": rule["keyword"], "category_id": cat_map[rule["category"]], "user_id": user_id}
+        for rule in DEFAULT_AUTO_TAG_RULES if rule["category"] in cat_map
+    ]
+    if rules and existing_rules is None:
+        db.execute(_dialect_insert(db, models.AutoTagRule.__table__, ("keyword", "user_id")), rules)
     db.commit()
+    matcher_cache.invalidate(user_id)
+    category_cache.invalidate(user_id)
 
 def get_categories(db: Session, user_id: int):
     return db.query(models.Category).filter(models.Category.user_id == user_id).order_by(models.Category.name).all()
 
+def get_categories_cached(db: Session, user_id: int):
+    """The user's categories as cached response models, seeding the defaults on first
+    use. An empty cached list means the user has none yet, so no COUNT is needed."""
+    def load():
+        return [schemas.Category.model_validate(c) for c in get_categories(db, user_id)]
+    categories = category_cache.get(user_id, "categories", load)
+    if not categories:
+        _insert_default_categories(db, user_id)
+        categories = category_cache.get(user_id, "categories", load)
+    return list(categories)
+
 def create_category(db: Session, category: schemas.CategoryCreate, user_id: int):
     existing = db.query(models.Category).filter(
         models.Category.name == category.name,
@@ -343,6 +600,7 @@ def create_category(db: Session, category: schemas.CategoryCreate, user_id: int)
     db.add(db_cat)
     db.commit()
     db.refresh(db_cat)
+    category_cache.invalidate(user_id)
     return db_cat
 
 def delete_category(db: Session, category_id: int, user_id: int):
@@ -356,8 +614,10 @@ def delete_category(db: Session, category_id: int, user_id: int):
     db.query(models.Expense).filter(
         models.Expense.category_id == category_id
     ).update({"category_id": None}, synchronize_session=False)
+    _move_rollups_to_uncategorized(db, user_id, category_id)
     db.delete(cat)
     db.commit()
+    category_cache.invalidate(user_id)
     return {"deleted": True}
 
 # ──────────────────────────────────────
@@ -384,13 +644,14 @@ def create_reimbursement(db: Session, reimbursement: schemas.ReimbursementCreate
         user_id=user_id
     )
     db.add(db_reimbursement)
-    db.commit()
-    db.refresh(db_reimbursement)
+    db.flush()
 
     # Update expenses and create coverage
+    before, after = [], []
     for expense in applicable:
         amount_to_cover = expense.amount - expense.reimbursed_amount
         if amount_to_cover > 0:
+            before.append(_rollup_snapshot(expense))
             expense.status = models.ExpenseStatus.REIMBURSED
             expense.reimbursed_amount = expense.amount
             
@@ -400,8 +661,13 @@ def create_reimbursement(db: Session, reimbursement: schemas.ReimbursementCreate
                 amount_applied=amount_to_cover
             )
             db.add(coverage)
-    
+            after.append(_rollup_snapshot(expense))
+
+    _update_summary(db, user_id, reimbursed=total_amount, reimbursements=1,
+                    reimbursement_date=db_reimbursement.date)
+    _update_rollups(db, user_id, _rollup_deltas(added=after, removed=before))
     db.commit()
+    db.refresh(db_reimbursement)
     return db_reimbursement
 
 def get_reimbursements(db: Session, skip: int = 0, limit: int = 100, user_id: int = None):
@@ -427,6 +693,223 @@ def get_reimbursement_items(db: Session, reimbursement_id: int):
         }
     for e in expenses]
 
+# ──────────────────────────────────────
+# USER SUMMARY
+# ──────────────────────────────────────
+
+def rebuild_user_summary(db: Session, user_id: int):
+    """Recompute a user's summary row from scratch (flushed, not committed)."""
+    spent, reimbursed, count = db.query(
+        func.coalesce(func.sum(models.Expense.amount), 0.0),
+        func.coalesce(func.sum(models.Expense.reimbursed_amount), 0.0),
+        func.count(models.Expense.id)
+    ).filter(models.Expense.user_id == user_id).one()
+    reimbursement_count, last_date = db.query(
+        func.count(models.Reimbursement.id),
+        func.max(models.Reimbursement.date)
+    ).filter(models.Reimbursement.user_id == user_id).one()
+    summary = db.get(models.UserSummary, user_id)
+    if summary is None:
+        summary = models.UserSummary(user_id=user_id)
+        db.add(summary)
+    summary.total_spent = spent
+    summary.total_reimbursed = reimbursed
+    summary.expense_count = count
+    summary.reimbursement_count = reimbursement_count
+    summary.last_reimbursement_date = last_date
+    db.flush()
+    return summary
+
+def _update_summary(db: Session, user_id: int, spent: float = 0.0, reimbursed: float = 0.0,
+                    expenses: int = 0, reimbursements: int = 0, reimbursement_date: datetime = None):
+    """Apply a delta to the user's summary inside the caller's transaction.
+    Pending changes are flushed first, so a missing row is rebuilt including them."""
+    db.flush()
+    S = models.UserSummary
+    values = {
+        "total_spent": S.total_spent + spent,
+        "total_reimbursed": S.total_reimbursed + reimbursed,
+        "expense_count": S.expense_count + expenses,
+        "reimbursement_count": S.reimbursement_count + reimbursements,
+        "updated_at": datetime.utcnow(),
+    }
+    if reimbursement_date is not None:
+        values["last_reimbursement_date"] = case(
+            (or_(S.last_reimbursement_date.is_(None), S.last_reimbursement_date < reimbursement_date), reimbursement_date),
+            else_=S.last_reimbursement_date
+        )
+    result = db.execute(update(S).where(S.user_id == user_id).values(values).execution_options(synchronize_session=False))
+    if result.rowcount == 0:
+        rebuild_user_summary(db, user_id)
+
+def get_user_summary(db: Session, user_id: int):
+    """The user's summary row; built on first access for accounts that predate it."""
+    summary = db.get(models.UserSummary, user_id)
+    if summary is None:
+        summary = rebuild_user_summary(db, user_id)
+        db.commit()
+    return summary
+
+# ──────────────────────────────────────
+# MONTHLY ROLLUPS
+# ──────────────────────────────────────
+
+ROLLUP_UNCATEGORIZED = 0
+
+def _rollup_snapshot(expense):
+    """(date, category_id, source, amount, reimbursed_amount) of an expense or ingest row dict."""
+    if isinstance(expense, dict):
+        return (expense["date"], expense["category_id"], expense["source"],
+                expense["amount"], expense["reimbursed_amount"])
+    return (expense.date, expense.category_id, expense.source, expense.amount, expense.reimbursed_amount)
+
+def _rollup_deltas(added=(), removed=()):
+    """Fold expense snapshots into {(year_month, category_id, source): [debit, credit, reimbursed, count]}.
+    Undated expenses have no month and are left out of the rollups."""
+    deltas = {}
+    for sign, snapshots in ((1, added), (-1, removed)):
+        for date, category_id, source, amount, reimbursed in snapshots:
+            if date is None:
+                continue
+            key = (date.strftime("%Y-%m"), category_id or ROLLUP_UNCATEGORIZED, source or "")
+            bucket = deltas.setdefault(key, [0.0, 0.0, 0.0, 0])
+            amount = amount or 0.0
+            if amount > 0:
+                bucket[0] += sign * amount
+            elif amount < 0:
+                bucket[1] -= sign * amount
+            bucket[2] += sign * (reimbursed or 0.0)
+            bucket[3] += sign
+    return deltas
+
+def _rollup_rows(user_id: int, deltas: dict):
+    return [
+        {"user_id": user_id, "year_month": year_month, "category_id": category_id, "source": source,
+         "debit_sum": debit, "credit_sum": credit, "reimbursed_sum": reimbursed, "count": count}
+        for (year_month, category_id, source), (debit, credit, reimbursed, count) in deltas.items()
+    ]
+
+def rebuild_user_rollups(db: Session, user_id: int):
+    """Recompute a user's monthly rollups from scratch (flushed, not committed)."""
+    db.flush()
+    R = models.ExpenseRollup
+    db.query(R).filter(R.user_id == user_id).delete(synchronize_session=False)
+    snapshots = db.query(
+        models.Expense.date, models.Expense.category_id, models.Expense.source,
+        models.Expense.amount, models.Expense.reimbursed_amount
+    ).filter(models.Expense.user_id == user_id).yield_per(INGEST_BATCH_SIZE)
+    rows = _rollup_rows(user_id, _rollup_deltas(added=snapshots))
+    for i in range(0, len(rows), INGEST_BATCH_SIZE):
+        db.execute(insert(R.__table__).values(rows[i:i + INGEST_BATCH_SIZE]))
+    # From here on the write paths can apply deltas instead of rebuilding
+    db.execute(
+        _dialect_insert(db, models.ExpenseRollupState.__table__, conflict_columns=("user_id",)),
+        [{"user_id": user_id, "built_at": datetime.utcnow()}]
+    )
+    db.flush()
+
+def _rollups_built(db: Session, user_id: int) -> bool:
+    return db.get(models.ExpenseRollupState, user_id) is not None
+
+def _update_rollups(db: Session, user_id: int, deltas: dict):
+    """Add `deltas` to the user's rollup buckets inside the caller's transaction,
+    creating missing buckets and dropping ones that no longer hold any expense.
+    Accounts whose rollups were never built are rebuilt instead, including the
+    caller's already applied change."""
+    deltas = {key: d for key, d in deltas.items() if any(d)}
+    if not deltas:
+        return
+    if not _rollups_built(db, user_id):
+        rebuild_user_rollups(db, user_id)
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as upsert
+    else:
+        rebuild_user_rollups(db, user_id)
+        return
+    R = models.ExpenseRollup.__table__
+    rows = _rollup_rows(user_id, deltas)
+    for i in range(0, len(rows), INGEST_BATCH_SIZE):
+        stmt = upsert(R).values(rows[i:i + INGEST_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[R.c.user_id, R.c.year_month, R.c.category_id, R.c.source],
+            set_={
+                "debit_sum": R.c.debit_sum + stmt.excluded.debit_sum,
+                "credit_sum": R.c.credit_sum + stmt.excluded.credit_sum,
+                "reimbursed_sum": R.c.reimbursed_sum + stmt.excluded.reimbursed_sum,
+                "count": R.c.count + stmt.excluded.count,
+            }
+        )
+        db.execute(stmt)
+    if any(d[3] < 0 for d in deltas.values()):
+        db.execute(R.delete().where(R.c.user_id == user_id, R.c.count <= 0))
+
+def _move_rollups_to_uncategorized(db: Session, user_id: int, category_id: int):
+    """Fold a deleted category's buckets into the uncategorized ones."""
+    R = models.ExpenseRollup
+    deltas = {}
+    for b in db.query(R).filter(R.user_id == user_id, R.category_id == category_id).all():
+        totals = [b.debit_sum, b.credit_sum, b.reimbursed_sum, b.count]
+        deltas[(b.year_month, category_id, b.source)] = [-v for v in totals]
+        deltas[(b.year_month, ROLLUP_UNCATEGORIZED, b.source)] = totals
+    _update_rollups(db, user_id, deltas)
+
+def get_rollups(db: Session, user_id: int, from_month: str = None, to_month: str = None,
+                source: str = None, category_id: int = None, group_by: str = "month_category"):
+    """Aggregate rollup buckets over a month range; one row per month, category, or both."""
+    R = models.ExpenseRollup
+    group_cols = {
+        "month": [R.year_month],
+        "category": [R.category_id],
+        "month_category": [R.year_month, R.category_id],
+    }.get(group_by)
+    if group_cols is None:
+        raise HTTPException(status_code=400, detail="group_by must be one of: month, category, month_category")
+    # Accounts that predate the rollups get theirs built on first access
+    if not _rollups_built(db, user_id):
+        rebuild_user_rollups(db, user_id)
+        db.commit()
+    query = db.query(
+        *group_cols,
+        func.sum(R.debit_sum).label("debit"),
+        func.sum(R.credit_sum).label("credit"),
+        func.sum(R.reimbursed_sum).label("reimbursed"),
+        func.sum(R.count).label("count"),
+    ).filter(R.user_id == user_id)
+    if from_month:
+        query = query.filter(R.year_month >= from_month)
+    if to_month:
+        query = query.filter(R.year_month <= to_month)
+    if source:
+        query = query.filter(R.source == source)
+    if category_id is not None:
+        query = query.filter(R.category_id == category_id)
+    rows = query.group_by(*group_cols).order_by(*group_cols).all()
+
+    names = {}
+    if group_by != "month":
+        names = dict(db.query(models.Category.id, models.Category.name).filter(
+            models.Category.user_id == user_id
+        ).all())
+    result = []
+    for row in rows:
+        item = {
+            "debit": round(row.debit or 0.0, 2),
+            "credit": round(row.credit or 0.0, 2),
+            "reimbursed": round(row.reimbursed or 0.0, 2),
+            "count": row.count or 0,
+        }
+        if group_by != "category":
+            item["month"] = row.year_month
+        if group_by != "month":
+            item["category_id"] = row.category_id or None
+            item["category_name"] = names.get(row.category_id, "Uncategorized")
+        result.append(item)
+    return result
+
 # ──────────────────────────────────────
 # STATEMENT UPLOADS
 # ──────────────────────────────────────
@@ -438,6 +921,31 @@ def create_statement_upload(db: Session, upload: schemas.StatementUploadBase, us
     db.refresh(db_upload)
     return db_upload
 
+def find_statement_upload_by_hash(db: Session, user_id: int, content_sha256: str, exclude_id: int = None):
+    """Most recent upload of the same bytes by this user that didn't fail, or None."""
+    query = db.query(models.StatementUpload).filter(
+        models.StatementUpload.user_id == user_id,
+        models.StatementUpload.content_sha256 == content_sha256,
+        models.StatementUpload.status != models.ImportStatus.FAILED.value
+    )
+    if exclude_id is not None:
+        query = query.filter(models.StatementUpload.id != exclude_id)
+    return query.order_by(models.StatementUpload.id.desc()).first()
+
+def get_statement_job(db: Session, job_id: int, user_id: int):
+    job = db.query(models.StatementUpload).filter(
+        models.StatementUpload.id == job_id,
+        models.StatementUpload.user_id == user_id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+def get_statement_jobs(db: Session, user_id: int, limit: int = 20):
+    return db.query(models.StatementUpload).filter(
+        models.StatementUpload.user_id == user_id
+    ).order_by(models.StatementUpload.id.desc()).limit(limit).all()
+
 # ──────────────────────────────────────
 # USER PROFILE
 # ──────────────────────────────────────
@@ -460,6 +968,12 @@ def update_user_profile(db: Session, user_id: int, data: schemas.UserProfileUpda
 def get_auto_tag_rules(db: Session, user_id: int):
     return db.query(models.AutoTagRule).filter(models.AutoTagRule.user_id == user_id).order_by(models.AutoTagRule.keyword).all()
 
+def get_auto_tag_rules_cached(db: Session, user_id: int):
+    """The user's auto-tag rules as cached response models."""
+    def load():
+        return [schemas.AutoTagRule.model_validate(r) for r in get_auto_tag_rules(db, user_id)]
+    return list(category_cache.get(user_id, "rules", load))
+
 def create_auto_tag_rule(db: Session, rule: schemas.AutoTagRuleCreate, user_id: int):
     # Normalize keyword to lowercase
     keyword = rule.keyword.strip().lower()
@@ -480,6 +994,8 @@ def create_auto_tag_rule(db: Session, rule: schemas.AutoTagRuleCreate, user_id:
     db.add(db_rule)
     db.commit()
     db.refresh(db_rule)
+    matcher_cache.invalidate(user_id)
+    category_cache.invalidate(user_id)
     return db_rule
 
 def delete_auto_tag_rule(db: Session, rule_id: int, user_id: int):
@@ -491,35 +1007,54 @@ def delete_auto_tag_rule(db: Session, rule_id: int, user_id: int):
         raise HTTPException(status_code=404, detail="Rule not found")
     db.delete(rule)
     db.commit()
+    matcher_cache.invalidate(user_id)
+    category_cache.invalidate(user_id)
     return {"deleted": True}
 
+def get_auto_tag_matcher(db: Session, user_id: int):
+    """Compiled matcher for the user's rules, cached until they change here or the TTL runs out."""
+    def load_rules():
+        return db.query(
+            models.AutoTagRule.id, models.AutoTagRule.keyword, models.AutoTagRule.category_id
+        ).filter(models.AutoTagRule.user_id == user_id).all()
+    return matcher_cache.get(user_id, load_rules)
+
 def auto_categorize_expense(db: Session, expense: models.Expense, user_id: int):
     """Match an expense's description against user's auto-tag rules and assign category."""
     if expense.category_id:  # Already categorized
         return
-    rules = db.query(models.AutoTagRule).filter(models.AutoTagRule.user_id == user_id).all()
-    desc_lower = expense.description.lower()
-    for rule in rules:
-        if rule.keyword in desc_lower:
-            expense.category_id = rule.category_id
-            return
+    category_id = get_auto_tag_matcher(db, user_id).match(expense.description)
+    if category_id:
+        expense.category_id = category_id
 
 def apply_auto_tags_to_all(db: Session, user_id: int):
     """Re-apply auto-tag rules to all uncategorized expenses."""
-    rules = db.query(models.AutoTagRule).filter(models.AutoTagRule.user_id == user_id).all()
-    if not rules:
+    matcher = get_auto_tag_matcher(db, user_id)
+    if not matcher.size:
         return {"tagged": 0}
-    uncategorized = db.query(models.Expense).filter(
+    uncategorized = db.query(
+        models.Expense.id, models.Expense.description, models.Expense.date,
+        models.Expense.source, models.Expense.amount, models.Expense.reimbursed_amount
+    ).filter(
         models.Expense.user_id == user_id,
         models.Expense.category_id == None
-    ).all()
+    ).yield_per(INGEST_BATCH_SIZE)
+    by_category = {}
+    before, after = [], []
+    for expense_id, description, date, source, amount, reimbursed in uncategorized:
+        category_id = matcher.match(description)
+        if category_id:
+            by_category.setdefault(category_id, []).append(expense_id)
+            before.append((date, None, source, amount, reimbursed))
+            after.append((date, category_id, source, amount, reimbursed))
     tagged = 0
-    for expense in uncategorized:
-        desc_lower = expense.description.lower()
-        for rule in rules:
-            if rule.keyword in desc_lower:
-                expense.category_id = rule.category_id
-                tagged += 1
-                break
+    for category_id, ids in by_category.items():
+        for i in range(0, len(ids), INGEST_BATCH_SIZE):
+            chunk = ids[i:i + INGEST_BATCH_SIZE]
+            db.query(models.Expense).filter(models.Expense.id.in_(chunk)).update(
+                {"category_id": category_id}, synchronize_session=False
+            )
+            tagged += len(chunk)
+    _update_rollups(db, user_id, _rollup_deltas(added=after, removed=before))
     db.commit()
     return {"tagged": tagged}
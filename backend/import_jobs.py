@@ -0,0 +1,262 @@
+"""
+Background statement imports.
+
+POST /api/statements/upload?background=true moves the spooled file into
+IMPORT_UPLOAD_DIR, records a QUEUED StatementUpload row and returns at once.
+The database is the queue: a worker thread in each app process claims the
+oldest queued job with a conditional UPDATE, parses it with page-level
+progress in the statement parse pool (parser.parse_statement_pooled) and
+imports it with crud.ingest_transactions. CSV and text exports
+are streamed instead: each chunk of rows is imported as soon as it is read, and the
+job's counts advance as it goes.
+
+Jobs survive restarts. A RUNNING job whose heartbeat (updated_at) is older
+than IMPORT_STALE_SECONDS belonged to a process that died and is claimed
+again, up to IMPORT_MAX_ATTEMPTS times. Every write a worker makes to its job
+is conditional on the attempt it claimed, so a worker that was only slow
+notices the reclaim at its next heartbeat and backs off without touching the
+new claimer's row or stored file.
+
+`python import_jobs.py` runs the same worker standalone, for deployments that
+set IMPORT_WORKER_ENABLED=0 on the web processes.
+"""
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session
+import crud, models
+from database import SessionLocal
+from utils import parse_cache, parser
+
+logger = logging.getLogger("import_jobs")
+
+IMPORT_UPLOAD_DIR = os.getenv("IMPORT_UPLOAD_DIR", "./uploads")
+IMPORT_WORKER_ENABLED = os.getenv("IMPORT_WORKER_ENABLED", "1") != "0"
+IMPORT_POLL_SECONDS = float(os.getenv("IMPORT_POLL_SECONDS", "2"))
+IMPORT_STALE_SECONDS = int(os.getenv("IMPORT_STALE_SECONDS", "300"))
+IMPORT_MAX_ATTEMPTS = int(os.getenv("IMPORT_MAX_ATTEMPTS", "3"))
+
+Status = models.ImportStatus
+Job = models.StatementUpload
+
+
+class JobReclaimed(Exception):
+    """Another worker claimed the job after this one's heartbeat went stale."""
+
+
+def enqueue_import(db: Session, upload_path: str, file_name: str, user_id: int, content_sha256: str = None):
+    """Move a spooled upload into IMPORT_UPLOAD_DIR and record a QUEUED job row;
+    the worker picks it up. The file at ``upload_path`` is consumed."""
+    job = Job(
+        file_name=file_name,
+        user_id=user_id,
+        num_transactions_imported=0,
+        content_sha256=content_sha256,
+        status=Status.QUEUED.value,
+        pages_done=0,
+        attempts=0,
+    )
+    db.add(job)
+    db.flush()
+    os.makedirs(IMPORT_UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(IMPORT_UPLOAD_DIR, f"job-{job.id}.upload")
+    try:
+        # A rename when the spool dir is on the same filesystem, a copy otherwise
+        shutil.move(upload_path, path + ".part")
+        os.replace(path + ".part", path)
+        job.stored_path = path
+        db.commit()
+    except Exception:
+        db.rollback()
+        _remove(path + ".part")
+        _remove(path)
+        raise
+    db.refresh(job)
+    worker.wake()
+    return job
+
+
+def claim_next_job(db: Session):
+    """Atomically mark the oldest runnable job RUNNING; returns (job id, attempt
+    number) or None. The attempt number is the claim's version for run_job()."""
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=IMPORT_STALE_SECONDS)
+    runnable = or_(
+        Job.status == Status.QUEUED.value,
+        and_(Job.status == Status.RUNNING.value, Job.updated_at < stale),
+    )
+    while True:
+        candidate = db.query(Job.id, Job.status, Job.attempts, Job.stored_path).filter(runnable).order_by(Job.id).first()
+        if candidate is None:
+            return None
+        attempts = candidate.attempts or 0
+        if attempts >= IMPORT_MAX_ATTEMPTS:
+            _finish(db, candidate.id, status=Status.FAILED,
+                    error=f"Gave up after {attempts} attempts", expect_attempts=attempts)
+            _remove(candidate.stored_path)
+            continue
+        # attempts doubles as a version: only one process can move it forward
+        claimed = db.query(Job).filter(
+            Job.id == candidate.id,
+            Job.status == candidate.status,
+            Job.attempts == candidate.attempts,
+        ).update({
+            "status": Status.RUNNING.value,
+            "attempts": attempts + 1,
+            "started_at": now,
+            "updated_at": now,
+            "error": None,
+        }, synchronize_session=False)
+        db.commit()
+        if claimed:
+            return candidate.id, attempts + 1
+
+
+def run_job(job_id: int, attempt: int):
+    """Parse and import one claimed job, recording progress and the outcome on its
+    row as long as the row is still on the claimed ``attempt``."""
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        path, file_name, user_id, content_sha256 = job.stored_path, job.file_name, job.user_id, job.content_sha256
+
+        def heartbeat(values):
+            values["updated_at"] = datetime.utcnow()
+            matched = db.query(Job).filter(Job.id == job_id, Job.attempts == attempt).update(
+                values, synchronize_session=False
+            )
+            db.commit()
+            if not matched:
+                raise JobReclaimed(f"Import job {job_id} was reclaimed after attempt {attempt}")
+
+        def progress(pages_done, pages_total):
+            heartbeat({"pages_done": pages_done, "pages_total": pages_total})
+
+        def imported(totals):
+            heartbeat({
+                "num_transactions_imported": totals["new_added"],
+                "existing_count": totals["existing"],
+                "auto_tagged_count": totals["auto_tagged"],
+            })
+
+        try:
+            # Parsers read the stored file directly; PDFs are never loaded whole
+            transactions = parse_cache.get(content_sha256)
+            fmt = parser.detect_format(path) if transactions is None else None
+            if fmt is not None and fmt.iter_batches is not None:
+                # CSV/text exports can be huge: import chunk by chunk as the file is read
+                result = crud.ingest_transaction_batches(db, fmt.iter_batches(path), user_id, progress=imported)
+            else:
+                if transactions is None:
+                    # Parsed in the statement process pool; only DB writes happen on this thread
+                    transactions = parser.parse_statement_pooled(path, file_name, progress=progress) if fmt is not None else []
+                    parse_cache.put(content_sha256, transactions)
+                # Committed in the streaming path's chunk size, with a heartbeat after each
+                chunk_rows = parser.CSV_CHUNK_ROWS
+                chunks = (transactions[i:i + chunk_rows] for i in range(0, len(transactions), chunk_rows))
+                result = crud.ingest_transaction_batches(db, chunks, user_id, progress=imported)
+        except JobReclaimed as e:
+            # The new claimer owns the row and the stored file now
+            logger.warning(str(e))
+            db.rollback()
+            return
+        except Exception as e:
+            logger.exception(f"Import job {job_id} failed")
+            db.rollback()
+            finished = _finish(db, job_id, status=Status.FAILED, error=str(e)[:500], expect_attempts=attempt)
+        else:
+            finished = _finish(db, job_id, status=Status.DONE, result=result, expect_attempts=attempt)
+        if finished:
+            _remove(path)
+        else:
+            logger.warning(f"Import job {job_id} was reclaimed after attempt {attempt}; leaving its file")
+    finally:
+        db.close()
+
+
+def _finish(db: Session, job_id: int, status, error: str = None, result: dict = None, expect_attempts: int = None):
+    """Record the job's outcome; with ``expect_attempts``, only if it is still on that
+    attempt. Returns whether the row was updated."""
+    query = db.query(Job).filter(Job.id == job_id)
+    if expect_attempts is not None:
+        query = query.filter(Job.attempts == expect_attempts)
+    now = datetime.utcnow()
+    values = {"status": status.value, "error": error, "finished_at": now, "updated_at": now}
+    if result is not None:
+        values.update(
+            num_transactions_imported=result["new_added"],
+            existing_count=result["existing"],
+            auto_tagged_count=result["auto_tagged"],
+        )
+    if status == Status.DONE:
+        # CSV/text statements don't report pages; show them as one complete page
+        job = query.first()
+        if job is not None and not job.pages_total:
+            values.update(pages_done=1, pages_total=1)
+    matched = query.update(values, synchronize_session=False)
+    db.commit()
+    return bool(matched)
+
+
+def _remove(path):
+    if path and os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not remove {path}: {e}")
+
+
+class ImportWorker:
+    """Single background thread that drains the job table, oldest first."""
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="import-worker", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run(self):
+        logger.info("Import worker started")
+        while not self._stop.is_set():
+            claimed = None
+            db = SessionLocal()
+            try:
+                claimed = claim_next_job(db)
+            except Exception as e:
+                logger.error(f"Claiming import job failed: {e}")
+            finally:
+                db.close()
+            if claimed is not None:
+                run_job(*claimed)
+                continue
+            self._wake.wait(IMPORT_POLL_SECONDS)
+            self._wake.clear()
+
+
+worker = ImportWorker()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
@@ -4,7 +4,10 @@ from sqlalchemy import text
 from time import time
 from fastapi.middleware.cors import CORSMiddleware
 from database import engine, Base
-from routers import statements, expenses, reimbursements, summary, auth, categories
+from routers import statements, expenses, reimbursements, summary, auth, categories, analytics
+import search
+import import_jobs
+from utils import parser, intake, passwords
 import os
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
@@ -17,6 +20,9 @@ try:
 except Exception as e:
     logger.error(f"Failed to create tables: {e}")
 
+# Description search index (FTS5 on SQLite, pg_trgm on Postgres); falls back to ILIKE
+search.ensure_search_backend(engine)
+
 app = FastAPI(title="ICICI Tracker")
 
 # Get CORS origins from environment or use default
@@ -31,15 +37,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized statements while they stream in, not after they are buffered
+app.add_middleware(intake.UploadSizeLimit, paths=("/api/statements/upload",))
+
 app.include_router(auth.router)
 # Also expose under '/api' namespace for canonical API paths
 app.include_router(auth.router, prefix="/api")
-logger.info("Routers registered: /api/auth/* and /auth/*, plus expenses/reimbursements/statements/summary")
+logger.info("Routers registered: /api/auth/* and /auth/*, plus expenses/reimbursements/statements/summary/analytics")
 app.include_router(statements.router)
 app.include_router(expenses.router)
 app.include_router(reimbursements.router)
 app.include_router(summary.router)
 app.include_router(categories.router)
+app.include_router(analytics.router)
 
 @app.get("/")
 def read_root():
@@ -55,6 +65,15 @@ def on_startup():
         logger.info("Startup DB connectivity OK")
     except Exception as e:
         logger.error(f"Startup DB connectivity failed: {e}")
+    # Background statement imports; also resumes jobs left over from a previous run
+    if import_jobs.IMPORT_WORKER_ENABLED:
+        import_jobs.worker.start()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    import_jobs.worker.stop()
+    parser.shutdown_statement_pool()
+    passwords.shutdown_pool()
 
 @app.get("/healthz")
 def healthz():
@@ -62,7 +81,9 @@ def healthz():
         "status": "ok",
         "db_status": "unknown",
         "db_type": "unknown",
-        "db_url_masked": "unknown"
+        "db_url_masked": "unknown",
+        # Login/signup bcrypt pool: queue depth, rejections, hash latency
+        "password_hashing": passwords.stats(),
     }
     
     # Determine DB type from URL
@@ -0,0 +1,59 @@
+"""
+Migration script: Add background import job columns to statement_uploads
+(status, progress, counts, error, heartbeat). Existing uploads become DONE.
+Works on SQLite and PostgreSQL. Safe to run multiple times — only adds the
+columns that are missing. Keep in sync with models.StatementUpload.
+"""
+import os
+import sys
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+from sqlalchemy import create_engine, inspect, text
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
+if DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+engine = create_engine(DATABASE_URL)
+
+TIMESTAMP = "TIMESTAMP" if engine.dialect.name == "postgresql" else "DATETIME"
+
+COLUMNS = [
+    ("status", "VARCHAR(16) DEFAULT 'DONE'"),
+    ("stored_path", "VARCHAR"),
+    ("pages_done", "INTEGER DEFAULT 0"),
+    ("pages_total", "INTEGER"),
+    ("existing_count", "INTEGER"),
+    ("auto_tagged_count", "INTEGER"),
+    ("error", "VARCHAR"),
+    ("attempts", "INTEGER DEFAULT 0"),
+    ("started_at", TIMESTAMP),
+    ("finished_at", TIMESTAMP),
+    ("updated_at", TIMESTAMP),
+]
+
+def run_migrations():
+    print(f"Connecting to: {DATABASE_URL.split('@')[-1] if '@' in DATABASE_URL else DATABASE_URL}")
+    existing = {c["name"] for c in inspect(engine).get_columns("statement_uploads")}
+    with engine.connect() as conn:
+        for i, (name, ddl) in enumerate(COLUMNS, 1):
+            if name in existing:
+                print(f"  Migration {i}/{len(COLUMNS)}: {name} already present")
+                continue
+            try:
+                conn.execute(text(f"ALTER TABLE statement_uploads ADD COLUMN {name} {ddl};"))
+                conn.commit()
+                print(f"  Migration {i}/{len(COLUMNS)}: added {name}")
+            except Exception as e:
+                print(f"  Migration {i}/{len(COLUMNS)}: FAILED - {e}")
+                sys.exit(1)
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_statement_uploads_status ON statement_uploads (status);"))
+        conn.commit()
+    print("All migrations complete!")
+
+if __name__ == "__main__":
+    run_migrations()
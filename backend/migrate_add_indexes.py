@@ -0,0 +1,57 @@
+"""
+Migration script: Add composite indexes on expenses for the per-user
+filter/sort paths (list, keyset pagination, summary, recurring, export).
+Works on SQLite and PostgreSQL. Safe to run multiple times — uses
+CREATE INDEX IF NOT EXISTS. Keep in sync with models.Expense.__table_args__.
+"""
+import os
+import sys
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+from sqlalchemy import create_engine, text
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
+if DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+engine = create_engine(DATABASE_URL)
+
+MIGRATIONS = [
+    # 1. Default date sort, date-range filters, keyset pagination on date
+    "CREATE INDEX IF NOT EXISTS ix_expenses_user_date_id ON expenses (user_id, date, id);",
+    # 2. Amount sort / min-max amount filters
+    "CREATE INDEX IF NOT EXISTS ix_expenses_user_amount_id ON expenses (user_id, amount, id);",
+    # 3. created_at sort
+    "CREATE INDEX IF NOT EXISTS ix_expenses_user_created_id ON expenses (user_id, created_at, id);",
+    # 4. Description sort and recurring GROUP BY description
+    "CREATE INDEX IF NOT EXISTS ix_expenses_user_description_id ON expenses (user_id, description, id);",
+    # 5. Category filter
+    "CREATE INDEX IF NOT EXISTS ix_expenses_user_category_date ON expenses (user_id, category_id, date);",
+    # 6. Status filter
+    "CREATE INDEX IF NOT EXISTS ix_expenses_user_status ON expenses (user_id, status);",
+    # 7. Recurring filter
+    "CREATE INDEX IF NOT EXISTS ix_expenses_user_recurring ON expenses (user_id, is_recurring);",
+]
+
+def run_migrations():
+    print(f"Connecting to: {DATABASE_URL.split('@')[-1] if '@' in DATABASE_URL else DATABASE_URL}")
+    with engine.connect() as conn:
+        for i, sql in enumerate(MIGRATIONS, 1):
+            try:
+                conn.execute(text(sql))
+                conn.commit()
+                print(f"  Migration {i}/{len(MIGRATIONS)}: OK")
+            except Exception as e:
+                print(f"  Migration {i}/{len(MIGRATIONS)}: FAILED - {e}")
+                sys.exit(1)
+        # Refresh planner statistics so the new indexes get picked up
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+    print("All migrations complete!")
+
+if __name__ == "__main__":
+    run_migrations()
@@ -0,0 +1,58 @@
+"""
+Migration script: Add the incremental recurring detector's state. Adds
+expenses.merchant_key with its index and creates the recurring_merchants
+and recurring_scans tables. Works on SQLite and PostgreSQL. Safe to run
+multiple times. Keep in sync with models.Expense, models.RecurringMerchant and
+models.RecurringScan.
+
+The next POST /api/expenses/detect-recurring per user then scans that user's
+whole history once; later runs only read expenses not folded in yet.
+"""
+import os
+import sys
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+from sqlalchemy import create_engine, inspect, text
+
+import models
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
+if DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+engine = create_engine(DATABASE_URL)
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_expenses_user_merchant ON expenses (user_id, merchant_key);",
+]
+
+def run_migrations():
+    print(f"Connecting to: {DATABASE_URL.split('@')[-1] if '@' in DATABASE_URL else DATABASE_URL}")
+    existing = {c["name"] for c in inspect(engine).get_columns("expenses")}
+    with engine.connect() as conn:
+        if "merchant_key" in existing:
+            print("  Migration 1/3: expenses.merchant_key already present")
+        else:
+            try:
+                conn.execute(text("ALTER TABLE expenses ADD COLUMN merchant_key VARCHAR;"))
+                conn.commit()
+                print("  Migration 1/3: added expenses.merchant_key")
+            except Exception as e:
+                print(f"  Migration 1/3: FAILED - {e}")
+                sys.exit(1)
+        for ddl in INDEXES:
+            conn.execute(text(ddl))
+        conn.commit()
+        print("  Migration 2/3: expense index for the recurring detector present")
+    models.Base.metadata.create_all(
+        bind=engine, tables=[models.RecurringMerchant.__table__, models.RecurringScan.__table__]
+    )
+    print("  Migration 3/3: recurring_merchants and recurring_scans present")
+    print("All migrations complete!")
+
+if __name__ == "__main__":
+    run_migrations()
@@ -0,0 +1,35 @@
+"""
+Migration script: Set up indexed description search.
+PostgreSQL: pg_trgm extension + GIN trigram index on expenses.description.
+SQLite: FTS5 trigram shadow table expenses_fts + sync triggers, populated
+from existing rows. Safe to run multiple times (the app also runs this on startup).
+"""
+import os
+import sys
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+from sqlalchemy import create_engine
+
+import search
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
+if DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+engine = create_engine(DATABASE_URL)
+
+def run_migrations():
+    print(f"Connecting to: {DATABASE_URL.split('@')[-1] if '@' in DATABASE_URL else DATABASE_URL}")
+    backend = search.ensure_search_backend(engine)
+    if backend == "like":
+        print("  Search index setup FAILED - searches will use unindexed ILIKE")
+        sys.exit(1)
+    print(f"  Search backend: {backend}: OK")
+    print("All migrations complete!")
+
+if __name__ == "__main__":
+    run_migrations()
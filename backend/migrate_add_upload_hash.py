@@ -0,0 +1,42 @@
+"""
+Migration script: Add content_sha256 to statement_uploads so re-uploads of the
+same file can be recognized, plus its (user_id, content_sha256) index.
+Works on SQLite and PostgreSQL. Safe to run multiple times. Run after
+migrate_add_import_jobs.py. Keep in sync with models.StatementUpload.
+"""
+import os
+import sys
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+from sqlalchemy import create_engine, inspect, text
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
+if DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+engine = create_engine(DATABASE_URL)
+
+def run_migrations():
+    print(f"Connecting to: {DATABASE_URL.split('@')[-1] if '@' in DATABASE_URL else DATABASE_URL}")
+    existing = {c["name"] for c in inspect(engine).get_columns("statement_uploads")}
+    with engine.connect() as conn:
+        try:
+            if "content_sha256" not in existing:
+                conn.execute(text("ALTER TABLE statement_uploads ADD COLUMN content_sha256 VARCHAR(64);"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_statement_uploads_user_sha256 "
+                "ON statement_uploads (user_id, content_sha256);"
+            ))
+            conn.commit()
+            print("  Migration 1/1: OK")
+        except Exception as e:
+            print(f"  Migration 1/1: FAILED - {e}")
+            sys.exit(1)
+    print("All migrations complete!")
+
+if __name__ == "__main__":
+    run_migrations()
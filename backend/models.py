@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, UniqueConstraint, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, UniqueConstraint, Boolean, Index
 from sqlalchemy.orm import relationship
 from database import Base
 import enum
@@ -9,6 +9,12 @@ class ExpenseStatus(str, enum.Enum):
     PARTIAL = "PARTIAL"
     REIMBURSED = "REIMBURSED"
 
+class ImportStatus(str, enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
 class Category(Base):
     __tablename__ = "categories"
 
@@ -53,12 +59,27 @@ class Expense(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     is_recurring = Column(Boolean, default=False)
+    # Normalized payee (see recurring.merchant_key), set by the recurring detector
+    merchant_key = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     category = relationship("Category", backref="expenses", lazy="joined")
 
     __table_args__ = (
         UniqueConstraint('transaction_hash', 'user_id', name='uix_expense_hash_user'),
+        # Every read is scoped to one user; these cover the list sorts (incl. the
+        # keyset id tiebreak), the category/status/recurring filters and summary.
+        # Keep in sync with migrate_add_indexes.py.
+        Index('ix_expenses_user_date_id', 'user_id', 'date', 'id'),
+        Index('ix_expenses_user_amount_id', 'user_id', 'amount', 'id'),
+        Index('ix_expenses_user_created_id', 'user_id', 'created_at', 'id'),
+        Index('ix_expenses_user_description_id', 'user_id', 'description', 'id'),
+        Index('ix_expenses_user_category_date', 'user_id', 'category_id', 'date'),
+        Index('ix_expenses_user_status', 'user_id', 'status'),
+        Index('ix_expenses_user_recurring', 'user_id', 'is_recurring'),
+        # Recurring detector: rows not folded yet (NULL key) and a merchant's rows.
+        # Created by migrate_add_recurring.py on existing databases.
+        Index('ix_expenses_user_merchant', 'user_id', 'merchant_key'),
     )
 
 class Reimbursement(Base):
@@ -87,6 +108,102 @@ class StatementUpload(Base):
     uploaded_at = Column(DateTime, default=datetime.utcnow)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     num_transactions_imported = Column(Integer)
+    content_sha256 = Column(String(64), nullable=True)  # SHA-256 of the uploaded bytes
+    # Background import job state (see import_jobs.py). Synchronous uploads are
+    # recorded straight as DONE. Plain string so ALTER TABLE works on both dialects.
+    status = Column(String(16), default=ImportStatus.DONE.value, index=True)
+    stored_path = Column(String, nullable=True)  # uploaded file, kept until the job finishes
+    pages_done = Column(Integer, default=0)
+    pages_total = Column(Integer, nullable=True)
+    existing_count = Column(Integer, nullable=True)
+    auto_tagged_count = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
+    attempts = Column(Integer, default=0)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)  # worker heartbeat
+
+    __table_args__ = (
+        Index('ix_statement_uploads_user_sha256', 'user_id', 'content_sha256'),
+    )
+
+class UserSummary(Base):
+    """Per-user running totals behind /api/summary, maintained by every crud
+    write path in the same transaction. Rebuild with rebuild_summaries.py."""
+    __tablename__ = "user_summaries"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_spent = Column(Float, default=0.0, nullable=False)
+    total_reimbursed = Column(Float, default=0.0, nullable=False)
+    expense_count = Column(Integer, default=0, nullable=False)
+    reimbursement_count = Column(Integer, default=0, nullable=False)
+    last_reimbursement_date = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ExpenseRollup(Base):
+    """Monthly spend per (user, month, category, source), maintained incrementally
+    by the crud write paths. category_id 0 = uncategorized, source '' = none."""
+    __tablename__ = "expense_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    year_month = Column(String(7), nullable=False)  # "YYYY-MM"
+    category_id = Column(Integer, nullable=False, default=0)
+    source = Column(String, nullable=False, default="")
+    debit_sum = Column(Float, nullable=False, default=0.0)
+    credit_sum = Column(Float, nullable=False, default=0.0)  # positive magnitude of credits
+    reimbursed_sum = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'year_month', 'category_id', 'source', name='uix_rollup_key'),
+    )
+
+class ExpenseRollupState(Base):
+    """Marks users whose expense_rollups cover their whole history. Accounts
+    that predate the rollups have no row until crud.rebuild_user_rollups runs,
+    which the first rollup write or read does."""
+    __tablename__ = "expense_rollup_states"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    built_at = Column(DateTime, default=datetime.utcnow)
+
+class RecurringMerchant(Base):
+    """Recurring detector state per (user, merchant key), updated incrementally from
+    new expenses by recurring.py: the most recent occurrences and the cadence,
+    confidence and next date inferred from their intervals."""
+    __tablename__ = "recurring_merchants"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    merchant_key = Column(String, nullable=False)
+    # JSON [[day ordinal, amount], ...] of the last RECURRING_HISTORY distinct days
+    history = Column(String, nullable=False, default="[]")
+    occurrences = Column(Integer, nullable=False, default=0)  # distinct days seen
+    first_seen = Column(DateTime, nullable=True)
+    last_seen = Column(DateTime, nullable=True)
+    interval_mean = Column(Float, nullable=True)  # days, over the kept history
+    interval_std = Column(Float, nullable=True)
+    typical_amount = Column(Float, nullable=True)
+    cadence = Column(String(16), nullable=True)  # "weekly" | "monthly" | "annual"
+    confidence = Column(Float, nullable=False, default=0.0)
+    is_recurring = Column(Boolean, nullable=False, default=False)
+    next_expected = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'merchant_key', name='uix_recurring_merchant_user_key'),
+        Index('ix_recurring_merchants_user_next', 'user_id', 'is_recurring', 'next_expected'),
+    )
+
+class RecurringScan(Base):
+    """Per-user lock row of the recurring detector (runs update it first, which
+    serializes them) and the highest expense id it has folded so far."""
+    __tablename__ = "recurring_scans"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    last_expense_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class User(Base):
     __tablename__ = "users"
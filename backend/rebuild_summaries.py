@@ -0,0 +1,28 @@
+"""
+Recompute every user's /api/summary totals (user_summaries) and monthly
+analytics rollups (expense_rollups) from expenses and reimbursements. Safe to
+run at any time; use it after manual DB edits or if the incrementally
+maintained totals are ever suspected to have drifted.
+"""
+from database import SessionLocal, engine, Base
+import models, crud
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("rebuild_summaries")
+
+def rebuild():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user_ids = [u.id for u in db.query(models.User.id).all()]
+        for user_id in user_ids:
+            crud.rebuild_user_summary(db, user_id)
+            crud.rebuild_user_rollups(db, user_id)
+            db.commit()
+        logger.info(f"Rebuilt summaries and rollups for {len(user_ids)} users.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild()
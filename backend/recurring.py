@@ -0,0 +1,401 @@
+"""
+Incremental recurring-expense detection.
+
+Every expense description is reduced to a merchant key: the payee, without the
+reference numbers and VPAs that change on every UPI/NEFT payment (see
+merchant_key()). For each user and merchant, recurring_merchants keeps the last
+RECURRING_HISTORY distinct days the merchant was paid plus what their intervals
+say: a weekly, monthly or annual cadence, a confidence and the next expected
+date. Folding an expense stores its key on the row, so update_recurring() only
+reads expenses whose merchant_key is still NULL. A run therefore costs O(new
+rows + merchants they touch x RECURRING_HISTORY), not O(history). All merchants
+touched by a batch are classified together with numpy (classify()). Runs for
+the same user serialize on a lock on their recurring_scans row, across processes.
+
+An expense is flagged is_recurring when its merchant is periodic with
+confidence >= RECURRING_MIN_CONFIDENCE or when its description names a known
+subscription. When a merchant crosses the threshold either way, its earlier
+expenses are re-flagged with one UPDATE on merchant_key.
+
+Deleting expenses or editing their description, date or amount rebuilds the
+affected merchants from the expenses left (refresh_merchants(), refold_expense()).
+delete_all_expenses() resets the user's state (reset()).
+"""
+import calendar
+import json
+import re
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import bindparam, case, func, insert, select, update
+from sqlalchemy.orm import Session
+
+import models
+
+# Known subscription keywords, matched as substrings of the lowercased description
+SUBSCRIPTION_KEYWORDS = [
+    'netflix', 'spotify', 'youtube', 'amazon prime', 'hotstar', 'disney',
+    'jio', 'airtel', 'vi ', 'bsnl', 'subscription', 'premium',
+    'apple', 'google one', 'icloud', 'microsoft', 'adobe',
+    'gym', 'membership', 'insurance', 'emi', 'sip',
+    'electricity', 'water bill', 'gas bill', 'internet', 'broadband',
+    'rent', 'maintenance'
+]
+# One alternation for the whole list: `~` on Postgres, REGEXP on SQLite, re here
+SUBSCRIPTION_PATTERN = "|".join(re.escape(kw) for kw in SUBSCRIPTION_KEYWORDS)
+_subscription_re = re.compile(SUBSCRIPTION_PATTERN)
+
+# Distinct payment days kept per merchant (two years of a monthly charge)
+RECURRING_HISTORY = 24
+# New expenses folded in per batch/commit
+RECURRING_SCAN_BATCH = 5000
+RECURRING_MIN_CONFIDENCE = 0.6
+# Keys per IN (...) list; keeps bound parameters under SQLite's limit
+KEY_CHUNK = 500
+# merchant_key of folded expenses that name no payee (NULL means not folded yet)
+NO_MERCHANT = ""
+
+# cadence -> (period in days, tolerance in days, intervals needed for full support)
+CADENCES = {
+    "weekly": (7.0, 1.5, 3),
+    "monthly": (30.44, 3.5, 2),
+    "annual": (365.25, 15.0, 1),
+}
+_CADENCE_NAMES = list(CADENCES)
+
+# Transaction-mode prefixes; a key made of one of these alone identifies no payee
+MODE_WORDS = {"upi", "neft", "imps", "rtgs", "atm", "pos", "bil", "ach", "nach", "ecs", "mmt", "cam", "inf"}
+_SEGMENT_SPLIT_RE = re.compile(r"[/|]")
+_NON_WORD_RE = re.compile(r"[^a-z& ]+")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def merchant_key(description):
+    """Normalize a statement description to a stable payee key, or None.
+
+    "UPI/NETFLIX/netflix.upi@hdfc/Payment fr/YES BANK/L/123456/IBL9f.." and the
+    same charge next month with a new reference both give "upi/netflix":
+    segments are split on "/", those holding a VPA or mostly digits (references)
+    are dropped, digits and punctuation are stripped, and the first two
+    remaining segments form the key."""
+    if not description:
+        return None
+    parts = []
+    for segment in _SEGMENT_SPLIT_RE.split(description.lower()):
+        segment = segment.strip()
+        if not segment or "@" in segment:
+            continue
+        if sum(ch.isdigit() for ch in segment) * 10 >= len(segment) * 3:
+            continue
+        segment = _SPACES_RE.sub(" ", _NON_WORD_RE.sub(" ", segment)).strip()
+        if segment:
+            parts.append(segment)
+        if len(parts) == 2:
+            break
+    if not parts or (len(parts) == 1 and parts[0] in MODE_WORDS):
+        return None
+    return "/".join(parts)[:120]
+
+
+def _expense_key(description, amount):
+    key = merchant_key(description)
+    # Credits (negative amounts) from a payee are tracked apart from payments to it
+    if key is not None and amount is not None and amount < 0:
+        key = f"credit:{key}"
+    return key
+
+
+def is_subscription(description) -> bool:
+    return bool(description) and _subscription_re.search(description.lower()) is not None
+
+
+def classify(histories):
+    """Cadence analysis for many merchants at once.
+
+    ``histories`` is a list of [(day ordinal, amount), ...] sorted by day. They are
+    padded into one NaN-filled matrix and every interval is scored against every
+    cadence in a few array operations. A cadence's score is the share of intervals
+    within its tolerance, scaled down until enough intervals back it. Confidence
+    is the best score, reduced when amounts vary a lot. Returns a list of
+    (cadence or None, confidence, interval mean, interval std, typical amount)."""
+    if not histories:
+        return []
+    width = max(len(h) for h in histories)
+    days = np.full((len(histories), width), np.nan)
+    amounts = np.full((len(histories), width), np.nan)
+    for i, history in enumerate(histories):
+        days[i, :len(history)] = [day for day, _ in history]
+        amounts[i, :len(history)] = [abs(amount) for _, amount in history]
+
+    intervals = np.diff(days, axis=1)  # NaN past the end of each row
+    valid = ~np.isnan(intervals)
+    n_intervals = valid.sum(axis=1)
+    denominator = np.maximum(n_intervals, 1)
+    filled = np.where(valid, intervals, 0.0)
+    mean = filled.sum(axis=1) / denominator
+    std = np.sqrt(np.where(valid, (filled - mean[:, None]) ** 2, 0.0).sum(axis=1) / denominator)
+
+    scores = np.empty((len(histories), len(CADENCES)))
+    for j, (period, tolerance, needed) in enumerate(CADENCES.values()):
+        hits = (np.abs(filled - period) <= tolerance) & valid
+        scores[:, j] = hits.sum(axis=1) / denominator * np.minimum(n_intervals / needed, 1.0)
+    best = scores.argmax(axis=1)
+    best_score = scores[np.arange(len(histories)), best]
+
+    amount_valid = ~np.isnan(amounts)
+    amount_count = np.maximum(amount_valid.sum(axis=1), 1)
+    amount_filled = np.where(amount_valid, amounts, 0.0)
+    amount_mean = amount_filled.sum(axis=1) / amount_count
+    amount_std = np.sqrt(np.where(amount_valid, (amount_filled - amount_mean[:, None]) ** 2, 0.0).sum(axis=1) / amount_count)
+    variation = np.divide(amount_std, amount_mean, out=np.zeros_like(amount_std), where=amount_mean > 0)
+    confidence = best_score * (1.0 - 0.5 * np.minimum(variation, 1.0))
+    typical = np.nanmedian(amounts, axis=1)
+
+    results = []
+    for i in range(len(histories)):
+        cadence = _CADENCE_NAMES[best[i]] if best_score[i] > 0 else None
+        results.append((
+            cadence,
+            round(float(confidence[i]), 3) if cadence else 0.0,
+            float(mean[i]) if n_intervals[i] else None,
+            float(std[i]) if n_intervals[i] else None,
+            round(float(typical[i]), 2),
+        ))
+    return results
+
+
+def _add_months(day: datetime, months: int) -> datetime:
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def next_expected(last_seen: datetime, cadence: str):
+    if cadence == "weekly":
+        return last_seen + timedelta(days=7)
+    if cadence == "monthly":
+        return _add_months(last_seen, 1)
+    if cadence == "annual":
+        return _add_months(last_seen, 12)
+    return None
+
+
+def _insert_ignore(db: Session, table, conflict_columns):
+    """INSERT that skips rows hitting the unique key on ``conflict_columns``."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(table)
+    return dialect_insert(table).on_conflict_do_nothing(index_elements=list(conflict_columns))
+
+
+def _lock_scan(db: Session, user_id: int):
+    """Take the user's detector lock for the rest of the transaction and return the
+    recurring_scans row. The row is created if missing and then updated: that
+    holds its row lock on Postgres, and the write lock on SQLite, until commit,
+    so runs in other processes (and edits, see refresh_merchants()) wait."""
+    now = datetime.utcnow()
+    scans = models.RecurringScan.__table__
+    db.execute(_insert_ignore(db, scans, ("user_id",)).values(user_id=user_id, last_expense_id=0, updated_at=now))
+    db.execute(update(scans).where(scans.c.user_id == user_id).values(updated_at=now))
+    return db.get(models.RecurringScan, user_id, populate_existing=True)
+
+
+def update_recurring(db: Session, user_id: int):
+    """Fold the user's expenses that haven't been folded yet (merchant_key NULL)
+    into recurring_merchants, RECURRING_SCAN_BATCH at a time under the user's
+    lock (one commit each, so an interrupted first run resumes where it stopped).
+    Returns {"updated": expenses whose is_recurring changed, "scanned": new
+    expenses read, "merchants": merchant states touched}."""
+    totals = {"updated": 0, "scanned": 0, "merchants": 0}
+    while True:
+        scan = _lock_scan(db, user_id)
+        # Unscanned rows are marked by a NULL key rather than found above an id
+        # watermark, so a transaction that commits late with lower ids isn't missed
+        rows = db.execute(
+            select(
+                models.Expense.id, models.Expense.date, models.Expense.description,
+                models.Expense.amount, models.Expense.is_recurring
+            ).where(
+                models.Expense.user_id == user_id,
+                models.Expense.merchant_key.is_(None)
+            ).limit(RECURRING_SCAN_BATCH)
+        ).all()
+        if not rows:
+            db.commit()
+            break
+        _fold_batch(db, user_id, rows, totals)
+        scan.last_expense_id = max(scan.last_expense_id or 0, max(row.id for row in rows))
+        db.commit()
+    return totals
+
+
+def _load_merchants(db: Session, user_id: int, keys):
+    merchants = {}
+    for i in range(0, len(keys), KEY_CHUNK):
+        for merchant in db.query(models.RecurringMerchant).filter(
+            models.RecurringMerchant.user_id == user_id,
+            models.RecurringMerchant.merchant_key.in_(keys[i:i + KEY_CHUNK])
+        ).populate_existing():
+            merchants[merchant.merchant_key] = merchant
+    return merchants
+
+
+def _get_or_create_merchants(db: Session, user_id: int, keys):
+    merchants = _load_merchants(db, user_id, keys)
+    missing = [key for key in keys if key not in merchants]
+    if missing:
+        db.execute(
+            _insert_ignore(db, models.RecurringMerchant.__table__, ("user_id", "merchant_key")),
+            [{"user_id": user_id, "merchant_key": key, "history": "[]", "occurrences": 0,
+              "confidence": 0.0, "is_recurring": False} for key in missing]
+        )
+        merchants.update(_load_merchants(db, user_id, missing))
+    return merchants
+
+
+def _classify_merchants(merchants):
+    """Re-derive cadence, confidence and the flag of ``merchants`` from their
+    history. Returns {True: keys that became recurring, False: keys that stopped},
+    counting only merchants whose rows were flagged from an earlier state."""
+    flipped = {True: [], False: []}
+    histories = [json.loads(merchant.history) for merchant in merchants]
+    for merchant, history, (cadence, confidence, mean, std, typical) in zip(merchants, histories, classify(histories)):
+        was_recurring = bool(merchant.is_recurring)
+        merchant.cadence = cadence
+        merchant.confidence = confidence
+        merchant.interval_mean = mean
+        merchant.interval_std = std
+        merchant.typical_amount = typical
+        merchant.last_seen = datetime.fromordinal(history[-1][0])
+        merchant.next_expected = next_expected(merchant.last_seen, cadence)
+        merchant.is_recurring = cadence is not None and confidence >= RECURRING_MIN_CONFIDENCE
+        if merchant.is_recurring != was_recurring:
+            flipped[merchant.is_recurring].append(merchant.merchant_key)
+    return flipped
+
+
+def _reflag(db: Session, user_id: int, flipped, totals=None):
+    """Re-flag the rows of merchants that crossed the threshold, either way."""
+    expenses = models.Expense.__table__
+    for state, keys in flipped.items():
+        flag = case((func.lower(expenses.c.description).regexp_match(SUBSCRIPTION_PATTERN), True), else_=state)
+        for i in range(0, len(keys), KEY_CHUNK):
+            result = db.execute(
+                update(expenses).where(
+                    expenses.c.user_id == user_id,
+                    expenses.c.merchant_key.in_(keys[i:i + KEY_CHUNK]),
+                    expenses.c.is_recurring.is_distinct_from(flag)
+                ).values(is_recurring=flag)
+            )
+            if totals is not None:
+                totals["updated"] += result.rowcount
+
+
+def _fold_batch(db: Session, user_id: int, rows, totals):
+    keyed = []
+    new_days = {}  # key -> {day ordinal: largest amount paid that day}
+    for row in rows:
+        key = _expense_key(row.description, row.amount) if row.date else None
+        keyed.append((row, key))
+        if key is not None:
+            days = new_days.setdefault(key, {})
+            day = row.date.toordinal()
+            days[day] = max(days.get(day, 0.0), abs(row.amount or 0.0))
+
+    existing = _get_or_create_merchants(db, user_id, list(new_days))
+    merchants = []
+    for key, days in new_days.items():
+        merchant = existing[key]
+        history = {day: amount for day, amount in json.loads(merchant.history or "[]")}
+        merchant.occurrences = (merchant.occurrences or 0) + sum(1 for day in days if day not in history)
+        # Largest payment per day, so re-imports and batch boundaries don't change it
+        for day, amount in days.items():
+            history[day] = max(history.get(day, 0.0), amount)
+        merchant.history = json.dumps(sorted(history.items())[-RECURRING_HISTORY:])
+        first = datetime.fromordinal(min(days))
+        if merchant.first_seen is None or first < merchant.first_seen:
+            merchant.first_seen = first
+        merchants.append(merchant)
+    flipped = _classify_merchants(merchants)
+    db.flush()
+
+    # The new rows: store their key (NO_MERCHANT when they name no payee) and flag
+    recurring_keys = {m.merchant_key for m in merchants if m.is_recurring}
+    params = []
+    for row, key in keyed:
+        flag = key in recurring_keys or is_subscription(row.description)
+        if row.is_recurring != flag:
+            totals["updated"] += 1
+        params.append({"row_id": row.id, "key": NO_MERCHANT if key is None else key, "flag": flag})
+    expenses = models.Expense.__table__
+    db.execute(
+        update(expenses).where(expenses.c.id == bindparam("row_id"))
+        .values(merchant_key=bindparam("key"), is_recurring=bindparam("flag")),
+        params
+    )
+    # Earlier rows of merchants that just crossed the threshold (this batch's are set above)
+    _reflag(db, user_id, flipped, totals)
+    totals["scanned"] += len(rows)
+    totals["merchants"] += len(merchants)
+
+
+def refresh_merchants(db: Session, user_id: int, keys):
+    """Rebuild the kept history of merchants ``keys`` from the expenses that carry
+    them now, after some were deleted or edited (flushed, not committed).
+    Merchants with no expenses left are dropped; ones that cross the threshold
+    have their rows re-flagged. Costs one indexed read of those merchants' rows."""
+    keys = sorted({key for key in keys if key})
+    if not keys:
+        return
+    db.flush()
+    _lock_scan(db, user_id)
+    days = {key: {} for key in keys}
+    for i in range(0, len(keys), KEY_CHUNK):
+        for key, date, amount in db.query(
+            models.Expense.merchant_key, models.Expense.date, models.Expense.amount
+        ).filter(
+            models.Expense.user_id == user_id,
+            models.Expense.merchant_key.in_(keys[i:i + KEY_CHUNK])
+        ):
+            if date is not None:
+                merchant_days = days[key]
+                day = date.toordinal()
+                merchant_days[day] = max(merchant_days.get(day, 0.0), abs(amount or 0.0))
+    kept = []
+    for key, merchant in _load_merchants(db, user_id, keys).items():
+        if not days[key]:
+            db.delete(merchant)
+            continue
+        merchant.history = json.dumps(sorted(days[key].items())[-RECURRING_HISTORY:])
+        merchant.occurrences = len(days[key])
+        merchant.first_seen = datetime.fromordinal(min(days[key]))
+        kept.append(merchant)
+    _reflag(db, user_id, _classify_merchants(kept))
+    db.flush()
+
+
+def refold_expense(db: Session, user_id: int, expense: models.Expense, old_key: str):
+    """Move an expense whose description, date or amount changed out of merchant
+    ``old_key`` and fold it in again (flushed, not committed)."""
+    expense.merchant_key = None
+    refresh_merchants(db, user_id, [old_key])
+    _fold_batch(db, user_id, [expense], {"updated": 0, "scanned": 0, "merchants": 0})
+    db.flush()
+
+
+def reset(db: Session, user_id: int):
+    """Forget the user's detector state (caller commits); the next run starts over."""
+    db.query(models.RecurringMerchant).filter(models.RecurringMerchant.user_id == user_id).delete(synchronize_session=False)
+    db.query(models.RecurringScan).filter(models.RecurringScan.user_id == user_id).delete(synchronize_session=False)
+
+
+def get_recurring_merchants(db: Session, user_id: int):
+    """The user's recurring merchants, soonest expected charge first."""
+    return db.query(models.RecurringMerchant).filter(
+        models.RecurringMerchant.user_id == user_id,
+        models.RecurringMerchant.is_recurring == True
+    ).order_by(models.RecurringMerchant.next_expected, models.RecurringMerchant.merchant_key).all()
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+import crud, schemas
+from database import get_db
+from routers.auth import CurrentUser, get_current_user
+
+router = APIRouter(
+    prefix="/api/analytics",
+    tags=["analytics"]
+)
+
+def _parse_month(value: Optional[str], name: str):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m").strftime("%Y-%m")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be YYYY-MM")
+
+@router.get("/rollups", response_model=schemas.AnalyticsRollups)
+def read_rollups(
+    from_month: Optional[str] = None,
+    to_month: Optional[str] = None,
+    group_by: str = "month_category",
+    source: Optional[str] = None,
+    category_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Spend totals per month and/or category over an inclusive month range,
+    served from the pre-aggregated rollups. `category_id=0` selects uncategorized."""
+    from_month = _parse_month(from_month, "from_month")
+    to_month = _parse_month(to_month, "to_month")
+    rows = crud.get_rollups(
+        db,
+        user_id=current_user.id,
+        from_month=from_month,
+        to_month=to_month,
+        source=source,
+        category_id=category_id,
+        group_by=group_by,
+    )
+    return {"group_by": group_by, "from_month": from_month, "to_month": to_month, "rows": rows}
@@ -1,5 +1,9 @@
 import logging
+import threading
+import time
+from collections import OrderedDict
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 import os
 try:
     from dotenv import load_dotenv  # type: ignore
@@ -10,10 +14,10 @@ except Exception:
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
 import schemas, models, crud
 from database import get_db
+from utils import passwords
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 logger = logging.getLogger("auth")
@@ -24,15 +28,32 @@ GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-def hash_password(password: str) -> str:
-    # bcrypt accepts max 72 bytes; truncate to avoid ValueError
-    return pwd_context.hash(password[:72])
+async def hash_password(password: str) -> str:
+    """bcrypt in the dedicated hashing pool; 503 when it is saturated."""
+    try:
+        return await passwords.hash_password_async(password)
+    except passwords.PasswordHashBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+async def verify_password(plain: str, hashed: str) -> bool:
+    """bcrypt in the dedicated hashing pool; 503 when it is saturated."""
+    try:
+        return await passwords.verify_password_async(plain, hashed)
+    except passwords.PasswordHashBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain[:72], hashed)
+def _get_user_by_email(db: Session, email: str):
+    return db.query(models.User).filter(models.User.email == email).first()
+
+def _get_user_by_id(db: Session, user_id: int):
+    return db.query(models.User).filter(models.User.id == user_id).first()
+
+def _add_user(db: Session, user: models.User):
+    db.add(user)
+    db.commit()
+    db.refresh(user)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -40,7 +61,85 @@ def create_access_token(data: dict):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+# Resolved users are cached per process by token subject, so authenticated
+# requests skip the users-table lookup. Entries expire after
+# AUTH_USER_CACHE_TTL_SECONDS (other worker processes see profile changes
+# within that time) and are dropped here on profile or password changes.
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1024"))
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+
+
+class CurrentUser:
+    """Detached snapshot of a User row: the columns routes read, without the
+    password hash and without a session behind it."""
+
+    __slots__ = ("id", "name", "email", "google_id", "created_at")
+
+    def __init__(self, id, name, email, google_id, created_at):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.google_id = google_id
+        self.created_at = created_at
+
+    @classmethod
+    def from_model(cls, user: models.User):
+        return cls(user.id, user.name, user.email, user.google_id, user.created_at)
+
+
+class UserCache:
+    """Thread-safe TTL + LRU cache of token subject (email) -> CurrentUser."""
+
+    def __init__(self, maxsize=AUTH_USER_CACHE_SIZE, ttl=AUTH_USER_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        # Bumped by every invalidation; one counter, so it doesn't grow per user
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def get(self, subject, loader):
+        """The cached user for ``subject``, or ``loader()``'s (cached unless None)."""
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return loader()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is not None:
+                user, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(subject)
+                    return user
+                del self._entries[subject]
+            invalidations = self._invalidations
+        user = loader()
+        if user is None:
+            return None
+        with self._lock:
+            # Don't cache a row read before a concurrent invalidate() (anyone's, to be safe)
+            if self._invalidations != invalidations:
+                return user
+            self._entries[subject] = (user, now + self.ttl)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, subject):
+        with self._lock:
+            self._entries.pop(subject, None)
+            self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+
+
+user_cache = UserCache()
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> CurrentUser:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -48,17 +147,21 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise HTTPException(status_code=401, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
-    
-    user = db.query(models.User).filter(models.User.email == email).first()
+
+    def load():
+        user = db.query(models.User).filter(models.User.email == email).first()
+        return CurrentUser.from_model(user) if user is not None else None
+
+    user = user_cache.get(email, load)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     return user
 
 @router.post("/signup", response_model=schemas.Token)
-def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
+async def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
     logger.info(f"Signup attempt for {user_data.email}")
     # Check if user exists
-    existing = db.query(models.User).filter(models.User.email == user_data.email).first()
+    existing = await run_in_threadpool(_get_user_by_email, db, user_data.email)
     if existing:
         logger.warning(f"Signup failed: email already registered {user_data.email}")
         raise HTTPException(status_code=400, detail="Email already registered")
@@ -67,11 +170,9 @@ def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
     user = models.User(
         name=user_data.name,
         email=user_data.email,
-        password_hash=hash_password(user_data.password)
+        password_hash=await hash_password(user_data.password)
     )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    await run_in_threadpool(_add_user, db, user)
     logger.info(f"User created: id={user.id} email={user.email}")
     
     # Generate token
@@ -80,14 +181,14 @@ def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
     return {"access_token": token, "token_type": "bearer"}
 
 @router.post("/login", response_model=schemas.Token)
-def login(credentials: schemas.UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: schemas.UserLogin, db: Session = Depends(get_db)):
     logger.info(f"Login attempt for {credentials.email}")
-    user = db.query(models.User).filter(models.User.email == credentials.email).first()
+    user = await run_in_threadpool(_get_user_by_email, db, credentials.email)
     if not user or not user.password_hash:
         logger.warning(f"Login failed for {credentials.email}: no user or no password")
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    if not verify_password(credentials.password, user.password_hash):
+    if not await verify_password(credentials.password, user.password_hash):
         logger.warning(f"Login failed for {credentials.email}: bad password")
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
@@ -135,6 +236,7 @@ def google_login(google_data: schemas.GoogleLogin, db: Session = Depends(get_db)
             if not user.google_id:
                 user.google_id = google_id
                 db.commit()
+                user_cache.invalidate(user.email)
             logger.info(f"Google login existing user {email}")
         else:
             # Create new user
@@ -163,22 +265,29 @@ def google_login(google_data: schemas.GoogleLogin, db: Session = Depends(get_db)
         raise HTTPException(status_code=500, detail=f"Google authentication failed: {e}")
 
 @router.get("/me", response_model=schemas.User)
-def get_me(current_user: models.User = Depends(get_current_user)):
+def get_me(current_user: CurrentUser = Depends(get_current_user)):
     logger.info(f"Get me for {current_user.email}")
     return current_user
 
 @router.put("/profile", response_model=schemas.User)
-def update_profile(data: schemas.UserProfileUpdate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def update_profile(data: schemas.UserProfileUpdate, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     logger.info(f"Profile update for {current_user.email}")
-    return crud.update_user_profile(db, user_id=current_user.id, data=data)
+    user = crud.update_user_profile(db, user_id=current_user.id, data=data)
+    user_cache.invalidate(current_user.email)
+    return user
 
 @router.put("/password")
-def change_password(data: schemas.PasswordChange, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+async def change_password(data: schemas.PasswordChange, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     logger.info(f"Password change for {current_user.email}")
-    if not current_user.password_hash:
+    # The cached snapshot carries no password hash; check against the row itself
+    user = await run_in_threadpool(_get_user_by_id, db, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    if not user.password_hash:
         raise HTTPException(status_code=400, detail="Google users cannot change password")
-    if not verify_password(data.old_password, current_user.password_hash):
+    if not await verify_password(data.old_password, user.password_hash):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
-    current_user.password_hash = hash_password(data.new_password)
-    db.commit()
+    user.password_hash = await hash_password(data.new_password)
+    await run_in_threadpool(db.commit)
+    user_cache.invalidate(current_user.email)
     return {"message": "Password changed successfully"}
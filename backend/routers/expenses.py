@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 import crud, models, schemas
 from database import get_db
-from routers.auth import get_current_user
+from routers.auth import CurrentUser, get_current_user
 import csv
 import io
 
@@ -30,12 +30,36 @@ def read_expenses(
     order: Optional[str] = "desc",
     category_id: Optional[int] = None,
     is_recurring: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
+    """Page mode (`page`/`per_page`) by default. Passing `cursor` (empty for the
+    first page, then each response's `next_cursor`) switches to keyset mode,
+    which skips the total count unless `include_total=true`."""
     from datetime import datetime
     from_date_dt = datetime.strptime(from_date, "%Y-%m-%d") if from_date else None
     to_date_dt = datetime.strptime(to_date, "%Y-%m-%d") if to_date else None
+    if cursor is not None:
+        return crud.get_expenses_keyset(
+            db,
+            cursor=cursor,
+            per_page=per_page,
+            q=q,
+            status=status,
+            source=source,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            from_date=from_date_dt,
+            to_date=to_date_dt,
+            sort_by=sort_by,
+            order=order,
+            user_id=current_user.id,
+            category_id=category_id,
+            is_recurring=is_recurring,
+            include_total=bool(include_total)
+        )
     return crud.get_expenses_paginated(
         db,
         page=page,
@@ -51,19 +75,20 @@ def read_expenses(
         order=order,
         user_id=current_user.id,
         category_id=category_id,
-        is_recurring=is_recurring
+        is_recurring=is_recurring,
+        include_total=include_total is not False
     )
 
 @router.post("/", response_model=schemas.Expense)
-def create_expense(expense: schemas.ExpenseCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def create_expense(expense: schemas.ExpenseCreate, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     return crud.create_expense(db, expense, user_id=current_user.id)
 
 @router.post("/bulk-delete")
-def bulk_delete_expenses(body: schemas.BulkDeleteRequest, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def bulk_delete_expenses(body: schemas.BulkDeleteRequest, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     return crud.delete_expenses_bulk(db, body.expense_ids, user_id=current_user.id)
 
 @router.delete("/all")
-def delete_all_expenses(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def delete_all_expenses(db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     return crud.delete_all_expenses(db, user_id=current_user.id)
 
 @router.get("/export")
@@ -79,59 +104,70 @@ def export_expenses_csv(
     order: Optional[str] = "desc",
     category_id: Optional[int] = None,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
+    """Streams the filtered expenses as CSV. get_db's session is closed once the
+    body has been sent (FastAPI >= 0.118 exits yield dependencies after a
+    StreamingResponse finishes)."""
     from datetime import datetime
     from_date_dt = datetime.strptime(from_date, "%Y-%m-%d") if from_date else None
     to_date_dt = datetime.strptime(to_date, "%Y-%m-%d") if to_date else None
-    
-    expenses = crud.get_expenses(
-        db, skip=0, limit=10000,
-        q=q, status=status, source=source,
-        min_amount=min_amount, max_amount=max_amount,
-        from_date=from_date_dt, to_date=to_date_dt,
-        sort_by=sort_by, order=order,
-        user_id=current_user.id, category_id=category_id
-    )
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Date", "Description", "Amount", "Type", "Status", "Category", "Recurring", "Source"])
-    
-    for e in expenses:
-        cat_name = e.category.name if e.category else ""
-        writer.writerow([
-            e.date.strftime("%Y-%m-%d") if e.date else "",
-            e.description,
-            e.amount,
-            "Credit" if e.amount < 0 else "Debit",
-            e.status.value if e.status else "",
-            cat_name,
-            "Yes" if e.is_recurring else "No",
-            e.source or ""
-        ])
-    
-    output.seek(0)
+    user_id = current_user.id
+
+    def generate():
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(["Date", "Description", "Amount", "Type", "Status", "Category", "Recurring", "Source"])
+        for batch in crud.iter_expense_export_rows(
+            db,
+            q=q, status=status, source=source,
+            min_amount=min_amount, max_amount=max_amount,
+            from_date=from_date_dt, to_date=to_date_dt,
+            sort_by=sort_by, order=order,
+            user_id=user_id, category_id=category_id
+        ):
+            for date, description, amount, row_status, cat_name, is_recurring, row_source in batch:
+                writer.writerow([
+                    date.strftime("%Y-%m-%d") if date else "",
+                    description,
+                    amount,
+                    "Credit" if amount < 0 else "Debit",
+                    row_status.value if row_status else "",
+                    cat_name or "",
+                    "Yes" if is_recurring else "No",
+                    row_source or ""
+                ])
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+        if output.tell():
+            yield output.getvalue()
+
     return StreamingResponse(
-        iter([output.getvalue()]),
+        generate(),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=expenses.csv"}
     )
 
 @router.post("/detect-recurring")
-def detect_recurring(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def detect_recurring(db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     return crud.detect_recurring_expenses(db, user_id=current_user.id)
 
+@router.get("/recurring", response_model=List[schemas.RecurringMerchant])
+def read_recurring(db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    """Merchants detected as recurring, with cadence, confidence and next expected date."""
+    return crud.get_recurring_merchants(db, user_id=current_user.id)
+
 @router.post("/apply-auto-tags")
-def apply_auto_tags(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def apply_auto_tags(db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     return crud.apply_auto_tags_to_all(db, user_id=current_user.id)
 
 # ─── Parameterized routes LAST ───
 
 @router.put("/{expense_id}", response_model=schemas.Expense)
-def update_expense(expense_id: int, data: schemas.ExpenseUpdate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def update_expense(expense_id: int, data: schemas.ExpenseUpdate, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     return crud.update_expense(db, expense_id, data, user_id=current_user.id)
 
 @router.delete("/{expense_id}")
-def delete_expense(expense_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def delete_expense(expense_id: int, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     return crud.delete_expense(db, expense_id, user_id=current_user.id)
@@ -1,78 +1,91 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-import crud, models, schemas
+from typing import List, Union
+import os
+import crud, schemas, import_jobs
 from database import get_db
-from utils import parser
-from routers.auth import get_current_user
+from utils import parser, parse_cache, intake
+from routers.auth import CurrentUser, get_current_user
 
 router = APIRouter(
     prefix="/api/statements",
     tags=["statements"]
 )
 
-@router.post("/upload", response_model=schemas.UploadSummary)
-async def upload_statement(file: UploadFile = File(...), db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    try:
-        content = await file.read()
-        transactions = parser.parse_statement(content, file.filename)
-        
-        if not transactions:
-            # Nothing parsed; record the upload with zero imports and return 200
-            crud.create_statement_upload(db, schemas.StatementUploadBase(
-                file_name=file.filename,
-                num_transactions_imported=0
-            ), user_id=current_user.id)
-            return {"uploaded": 1, "existing": 0, "new_added": 0, "auto_tagged": 0}
-        
-        new_added = 0
-        existing = 0
-        auto_tagged = 0
-        
-        for txn in transactions:
-            try:
-                txn_hash = parser.generate_transaction_hash(txn["date"], txn["description"], txn["amount"])
-                
-                # Check if exists
-                if crud.get_expense_by_hash(db, txn_hash, user_id=current_user.id):
-                    existing += 1
-                    continue
-                
-                # Create new expense
-                expense_create = schemas.ExpenseCreate(
-                    **txn,
-                    transaction_hash=txn_hash
-                )
-                db_expense = crud.create_expense(db, expense_create, user_id=current_user.id)
-                
-                # Auto-tag based on user's rules
-                crud.auto_categorize_expense(db, db_expense, user_id=current_user.id)
-                if db_expense.category_id:
-                    auto_tagged += 1
-                
-                new_added += 1
-            except Exception as e:
-                print(f"Error processing transaction: {e}, Transaction: {txn}")
-                continue
-        
-        # Commit any auto-tag changes
-        db.commit()
-            
-        # Record upload
+def _import_transactions(db: Session, transactions: list, file_name: str, user_id: int, content_sha256: str):
+    """Blocking DB half of an upload; runs in the threadpool."""
+    if not transactions:
+        # Nothing parsed; record the upload with zero imports and return 200
         crud.create_statement_upload(db, schemas.StatementUploadBase(
-            file_name=file.filename,
-            num_transactions_imported=new_added
-        ), user_id=current_user.id)
-        
-        return {
-            "uploaded": 1,
-            "existing": existing,
-            "new_added": new_added,
-            "auto_tagged": auto_tagged
-        }
+            file_name=file_name,
+            num_transactions_imported=0,
+            content_sha256=content_sha256
+        ), user_id=user_id)
+        return {"uploaded": 1, "existing": 0, "new_added": 0, "auto_tagged": 0}
+
+    result = crud.ingest_transactions(db, transactions, user_id=user_id)
+
+    # Record upload
+    crud.create_statement_upload(db, schemas.StatementUploadBase(
+        file_name=file_name,
+        num_transactions_imported=result["new_added"],
+        content_sha256=content_sha256
+    ), user_id=user_id)
+
+    return {"uploaded": 1, **result}
+
+@router.post("/upload", response_model=Union[schemas.UploadSummary, schemas.StatementJob])
+async def upload_statement(
+    response: Response,
+    file: UploadFile = File(...),
+    background: bool = False,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Import a statement. With `background=true` the file is queued as an import
+    job and a 202 with the job is returned at once; poll /jobs/{id} for progress.
+
+    Files are identified by SHA-256: a repeat of one of the user's earlier uploads
+    is reported as `duplicate_of`, and any file parsed before (by anyone) is served
+    from the parse cache. Ingest still runs, so deleted rows come back."""
+    # Parsing runs in a process pool and DB work in the threadpool, so the
+    # event loop keeps serving other requests while a statement is imported.
+    # The body is streamed to a temp file while it is hashed; parsers read that file.
+    upload_path = None
+    try:
+        suffix = os.path.splitext(file.filename or "")[1].lower()
+        upload_path, content_sha256, _ = await run_in_threadpool(intake.spool_upload, file.file, suffix)
+        if background:
+            job = await run_in_threadpool(import_jobs.enqueue_import, db, upload_path, file.filename, current_user.id, content_sha256)
+            upload_path = None  # now owned by the job
+            response.status_code = 202
+            return schemas.StatementJob.model_validate(job)
+        previous = await run_in_threadpool(crud.find_statement_upload_by_hash, db, current_user.id, content_sha256)
+        transactions = await run_in_threadpool(parse_cache.get, content_sha256)
+        if transactions is None:
+            transactions = await parser.parse_statement_async(upload_path, file.filename)
+            await run_in_threadpool(parse_cache.put, content_sha256, transactions)
+        result = await run_in_threadpool(_import_transactions, db, transactions, file.filename, current_user.id, content_sha256)
+        if previous is not None:
+            result["duplicate_of"] = previous.id
+        return result
     except HTTPException:
         raise
+    except (parser.StatementTooLarge, intake.UploadTooLarge) as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         print(f"Upload error: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+    finally:
+        intake.discard(upload_path)
+
+@router.get("/jobs", response_model=List[schemas.StatementJob])
+def read_jobs(db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    return crud.get_statement_jobs(db, user_id=current_user.id)
+
+@router.get("/jobs/{job_id}", response_model=schemas.StatementJob)
+def read_job(job_id: int, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    return crud.get_statement_job(db, job_id, user_id=current_user.id)
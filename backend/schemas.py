@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
 from typing import List, Optional
-from models import ExpenseStatus
+from models import ExpenseStatus, ImportStatus
 
 # --- Expense ---
 
@@ -72,6 +72,7 @@ class Reimbursement(ReimbursementBase):
 class StatementUploadBase(BaseModel):
     file_name: str
     num_transactions_imported: int
+    content_sha256: Optional[str] = None
 
 class StatementUpload(StatementUploadBase):
     id: int
@@ -80,10 +81,29 @@ class StatementUpload(StatementUploadBase):
     class Config:
         from_attributes = True
 
+class StatementJob(BaseModel):
+    id: int
+    file_name: str
+    status: ImportStatus
+    uploaded_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    pages_done: Optional[int] = 0
+    pages_total: Optional[int] = None  # known once the PDF is opened
+    num_transactions_imported: Optional[int] = None
+    existing_count: Optional[int] = None
+    auto_tagged_count: Optional[int] = None
+    error: Optional[str] = None
+    content_sha256: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
 class UploadSummary(BaseModel):
     uploaded: int
     existing: int
     new_added: int
+    duplicate_of: Optional[int] = None  # earlier upload of the identical file by this user
 
 # --- Category ---
 
@@ -155,11 +175,44 @@ class AutoTagRule(BaseModel):
     class Config:
         from_attributes = True
 
+# --- Recurring ---
+
+class RecurringMerchant(BaseModel):
+    merchant_key: str
+    cadence: Optional[str] = None         # "weekly" | "monthly" | "annual"
+    confidence: float
+    occurrences: int
+    typical_amount: Optional[float] = None
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    next_expected: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 # --- Paginated Response ---
 
 class PaginatedExpenses(BaseModel):
     items: List[Expense]
-    total: int
-    page: int
-    pages: int
+    total: Optional[int] = None       # omitted when include_total=false
+    page: Optional[int] = None        # page mode only
+    pages: Optional[int] = None       # page mode only, needs total
     per_page: int
+    next_cursor: Optional[str] = None # cursor mode only; None on the last page
+
+# --- Analytics ---
+
+class RollupRow(BaseModel):
+    month: Optional[str] = None           # "YYYY-MM"; omitted when grouped by category
+    category_id: Optional[int] = None     # None = uncategorized
+    category_name: Optional[str] = None   # omitted when grouped by month
+    debit: float
+    credit: float
+    reimbursed: float
+    count: int
+
+class AnalyticsRollups(BaseModel):
+    group_by: str
+    from_month: Optional[str] = None
+    to_month: Optional[str] = None
+    rows: List[RollupRow]
@@ -0,0 +1,117 @@
+"""
+Indexed substring search on expense descriptions.
+
+- PostgreSQL: pg_trgm GIN index on expenses.description; ILIKE '%q%' uses it
+  directly and similarity() gives relevance.
+- SQLite: FTS5 trigram shadow table `expenses_fts` (external content on
+  expenses), kept in sync by triggers; bm25 rank gives relevance.
+
+Both are pre-filters: the original ILIKE is still applied, so results keep
+plain substring semantics. Queries shorter than a trigram (or containing LIKE
+wildcards) skip the index and use ILIKE alone, as do databases where the
+backend could not be set up.
+"""
+import logging
+from sqlalchemy import text, func, select, literal_column, table, column
+import models
+
+logger = logging.getLogger("search")
+
+MIN_INDEXED_QUERY_LEN = 3
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts USING fts5(
+        description, content='expenses', content_rowid='id', tokenize='trigram'
+    );
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_fts_ai AFTER INSERT ON expenses BEGIN
+        INSERT INTO expenses_fts(rowid, description) VALUES (new.id, new.description);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_fts_ad AFTER DELETE ON expenses BEGIN
+        INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.id, old.description);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_fts_au AFTER UPDATE OF description ON expenses BEGIN
+        INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.id, old.description);
+        INSERT INTO expenses_fts(rowid, description) VALUES (new.id, new.description);
+    END;
+    """,
+]
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+    "CREATE INDEX IF NOT EXISTS ix_expenses_description_trgm ON expenses USING gin (description gin_trgm_ops);",
+]
+
+expenses_fts = table("expenses_fts", column("rowid"), column("rank"))
+
+# engine -> "fts5" | "trgm" | "like"
+_backends = {}
+
+
+def ensure_search_backend(engine):
+    """Create the search index for this engine's dialect (idempotent) and remember which backend is usable."""
+    dialect = engine.dialect.name
+    backend = "like"
+    try:
+        with engine.connect() as conn:
+            if dialect == "sqlite":
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type='table' AND name='expenses_fts'"
+                )).first()
+                for sql in SQLITE_DDL:
+                    conn.execute(text(sql))
+                if not exists:
+                    # Index rows that predate the shadow table
+                    conn.execute(text("INSERT INTO expenses_fts(expenses_fts) VALUES ('rebuild')"))
+                backend = "fts5"
+            elif dialect == "postgresql":
+                for sql in POSTGRES_DDL:
+                    conn.execute(text(sql))
+                backend = "trgm"
+            conn.commit()
+    except Exception as e:
+        logger.error(f"Search index setup failed, falling back to ILIKE: {e}")
+        backend = "like"
+    _backends[engine] = backend
+    logger.info(f"Description search backend: {backend}")
+    return backend
+
+
+def search_backend(db):
+    return _backends.get(db.get_bind(), "like")
+
+
+def _uses_index(q: str) -> bool:
+    return len(q) >= MIN_INDEXED_QUERY_LEN and "%" not in q and "_" not in q
+
+
+def _fts_match(q: str):
+    # Quote as a single FTS5 phrase so the query is matched literally
+    phrase = '"' + q.replace('"', '""') + '"'
+    return literal_column("expenses_fts").op("MATCH")(phrase)
+
+
+def filter_description(query, db, q: str):
+    """Restrict `query` to expenses whose description contains `q` (case-insensitive)."""
+    query = query.filter(models.Expense.description.ilike(f"%{q}%"))
+    if search_backend(db) == "fts5" and _uses_index(q):
+        matches = select(expenses_fts.c.rowid).where(_fts_match(q))
+        query = query.filter(models.Expense.id.in_(matches))
+    return query
+
+
+def order_by_relevance(query, db, q: str):
+    """Order an already-filtered query by match quality, best first (newest first on ties)."""
+    backend = search_backend(db)
+    if backend == "fts5" and _uses_index(q):
+        ranked = select(expenses_fts.c.rowid, expenses_fts.c.rank).where(_fts_match(q)).subquery()
+        query = query.join(ranked, ranked.c.rowid == models.Expense.id).order_by(ranked.c.rank)
+    elif backend == "trgm":
+        query = query.order_by(func.similarity(models.Expense.description, q).desc())
+    return query.order_by(models.Expense.date.desc(), models.Expense.id.desc())
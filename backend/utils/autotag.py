@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Max number of users whose compiled matcher is kept in memory, and how long one
+# is used before being rebuilt (bounds staleness when several processes serve
+# the API; rule changes made here invalidate at once).
+MATCHER_CACHE_SIZE = 256
+MATCHER_CACHE_TTL_SECONDS = float(os.getenv("MATCHER_CACHE_TTL_SECONDS", "300"))
+
+
+class AutoTagMatcher:
+    """Aho-Corasick automaton over a user's auto-tag keywords.
+
+    `match()` walks a description once and returns the category of the best
+    matching rule: the longest keyword wins, ties go to the oldest rule (lowest id).
+    """
+
+    def __init__(self, rules):
+        # rules: iterable of (rule_id, keyword, category_id)
+        self.goto = [{}]
+        self.fail = [0]
+        # Best (keyword length, -rule_id, category_id) ending at each state, fail chain included
+        self.best = [None]
+        self.size = 0
+        for rule_id, keyword, category_id in rules:
+            keyword = (keyword or "").lower()
+            if not keyword:
+                continue
+            self._add(keyword, (len(keyword), -rule_id, category_id))
+            self.size += 1
+        self._build_fail_links()
+
+    def _add(self, keyword, candidate):
+        state = 0
+        for ch in keyword:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.best.append(None)
+            state = nxt
+        if self.best[state] is None or candidate > self.best[state]:
+            self.best[state] = candidate
+
+    def _build_fail_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                inherited = self.best[self.fail[nxt]]
+                if inherited is not None and (self.best[nxt] is None or inherited > self.best[nxt]):
+                    self.best[nxt] = inherited
+
+    def match(self, description):
+        """Return the category_id of the winning rule for `description`, or None."""
+        if not self.size or not description:
+            return None
+        goto, fail, best_at = self.goto, self.fail, self.best
+        state = 0
+        best = None
+        for ch in description.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            candidate = best_at[state]
+            if candidate is not None and (best is None or candidate > best):
+                best = candidate
+        return best[2] if best else None
+
+
+class MatcherCache:
+    """Thread-safe per-user TTL + LRU cache of compiled matchers.
+
+    Entries are process-local: every write path that changes a user's rules
+    must call `invalidate(user_id)`; other processes pick the change up when
+    their entry expires.
+    """
+
+    def __init__(self, maxsize=MATCHER_CACHE_SIZE, ttl=MATCHER_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user_id -> (matcher, expires)
+        # Bumped by every invalidate(); one counter, so it doesn't grow per user
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                matcher, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(user_id)
+                    return matcher
+                del self._entries[user_id]
+            invalidations = self._invalidations
+        matcher = AutoTagMatcher(loader())
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return matcher
+        with self._lock:
+            # Don't cache a matcher built while rules were changing (anyone's, to be safe)
+            if self._invalidations != invalidations:
+                return matcher
+            self._entries[user_id] = (matcher, now + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return matcher
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._invalidations += 1
+
+
+matcher_cache = MatcherCache()
@@ -0,0 +1,60 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Max number of users whose categories and auto-tag rules are kept in memory,
+# and how long a snapshot is served before being reloaded (bounds staleness
+# when several processes serve the API; changes made here invalidate at once).
+CATEGORY_CACHE_SIZE = int(os.getenv("CATEGORY_CACHE_SIZE", "1024"))
+CATEGORY_CACHE_TTL_SECONDS = float(os.getenv("CATEGORY_CACHE_TTL_SECONDS", "300"))
+
+
+class CategoryCache:
+    """Per-user snapshots of categories and auto-tag rules (process-local).
+
+    ``get()`` loads a list once and hands out the same immutable snapshot (a
+    tuple of detached response models) until invalidate() or the TTL. A list
+    loaded while any invalidate() ran is returned but not cached; a single
+    counter tracks that, so nothing is kept per user beyond the entries.
+    Entries are evicted least-recently-used past ``maxsize`` users.
+    """
+
+    def __init__(self, maxsize=CATEGORY_CACHE_SIZE, ttl=CATEGORY_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user_id -> {kind: (snapshot, expires)}
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id, kind: str, loader):
+        """The cached ``kind`` ("categories" or "rules") snapshot, else ``tuple(loader())``."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and kind in entry:
+                snapshot, expires = entry[kind]
+                if expires > now:
+                    self._entries.move_to_end(user_id)
+                    return snapshot
+                del entry[kind]
+            invalidations = self._invalidations
+        snapshot = tuple(loader())
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return snapshot
+        with self._lock:
+            if self._invalidations != invalidations:
+                return snapshot
+            self._entries.setdefault(user_id, {})[kind] = (snapshot, now + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._invalidations += 1
+
+
+category_cache = CategoryCache()
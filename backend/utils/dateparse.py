@@ -0,0 +1,94 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+
+# Recently seen date strings per parser; statements repeat the same dates a lot.
+DATE_CACHE_SIZE = 4096
+
+_MONTHS = {name: i for i, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1
+)}
+
+# (format, regex, group order) in the same order parse_date always tried them.
+# A string can only match one of these shapes, so the order never changes a result.
+_FAST_FORMATS = (
+    ("%d/%m/%Y", re.compile(r"([0-9]{1,2})/([0-9]{1,2})/([0-9]{4})"), "dmy"),
+    ("%d-%m-%Y", re.compile(r"([0-9]{1,2})-([0-9]{1,2})-([0-9]{4})"), "dmy"),
+    ("%d.%m.%Y", re.compile(r"([0-9]{1,2})\.([0-9]{1,2})\.([0-9]{4})"), "dmy"),
+    ("%Y-%m-%d", re.compile(r"([0-9]{4})-([0-9]{1,2})-([0-9]{1,2})"), "ymd"),
+    ("%d-%b-%Y", re.compile(r"([0-9]{1,2})-([A-Za-z]{3})-([0-9]{4})"), "dby"),
+)
+_SLOW_FORMATS = tuple(fmt for fmt, _, _ in _FAST_FORMATS)
+
+
+def _parse_date_slow(date_str: str):
+    """The original strptime loop, kept for anything the fast paths don't accept."""
+    for fmt in _SLOW_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    # Try without leading zeros
+    try:
+        parts = re.split(r'[./-]', date_str)
+        if len(parts) == 3:
+            day, month, year = parts
+            return datetime(int(year), int(month), int(day))
+    except (ValueError, TypeError, OverflowError):
+        pass
+    return None
+
+
+class DateParser:
+    """Statement date parser: regex + int construction instead of strptime.
+
+    `sniff()` detects a statement's format from a sample so every later call
+    tries that format first. Results are memoized in a per-parser LRU.
+    """
+
+    def __init__(self, preferred: str = None):
+        self.formats = sorted(_FAST_FORMATS, key=lambda f: f[0] != preferred)
+        self.parse = lru_cache(maxsize=DATE_CACHE_SIZE)(self._parse)
+
+    @property
+    def preferred(self):
+        return self.formats[0][0]
+
+    @classmethod
+    def sniff(cls, samples, limit: int = 50):
+        """Build a parser preferring the format that matches most of the first `limit` samples."""
+        hits = {}
+        for i, value in enumerate(samples):
+            if i >= limit:
+                break
+            if not isinstance(value, str):
+                continue
+            value = value.strip()
+            for fmt, regex, _ in _FAST_FORMATS:
+                if regex.fullmatch(value):
+                    hits[fmt] = hits.get(fmt, 0) + 1
+                    break
+        return cls(max(hits, key=hits.get) if hits else None)
+
+    def _parse(self, date_str: str):
+        date_str = date_str.strip()
+        for _, regex, order in self.formats:
+            m = regex.fullmatch(date_str)
+            if not m:
+                continue
+            a, b, c = m.groups()
+            try:
+                if order == "dmy":
+                    return datetime(int(c), int(b), int(a))
+                if order == "ymd":
+                    return datetime(int(a), int(b), int(c))
+                month = _MONTHS.get(b.lower())
+                if month:
+                    return datetime(int(c), month, int(a))
+            except ValueError:
+                pass
+            break
+        return _parse_date_slow(date_str)
+
+
+default_date_parser = DateParser()
@@ -0,0 +1,79 @@
+"""
+Statement format registry.
+
+Each bank format declares which container it reads ("pdf" or "text"), a cheap
+sniff(first_bytes, first_page_text) returning a score between 0 and 1, and the
+parser that handles it. parser.parse_statement() probes a file once, scores the
+formats registered for its container and runs only the best one.
+
+Sniffers must stay cheap (string checks on a few KB) since every registered
+format is scored for every upload. A format that doesn't recognize a file
+returns 0; the built-in ICICI formats return a small non-zero score for
+anything in their container so they stay the catch-all.
+
+New formats call register() from a module that utils/parser.py imports.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StatementFormat:
+    """A registered bank statement format.
+
+    ``parse(source, progress=None)`` returns a list of transaction dicts;
+    ``iter_batches(source)``, when given, yields them in lists so large files
+    can be imported as they are read.
+    """
+
+    def __init__(self, name: str, container: str, sniff, parse, iter_batches=None):
+        self.name = name
+        self.container = container
+        self.sniff = sniff
+        self.parse = parse
+        self.iter_batches = iter_batches
+
+    def __repr__(self):
+        return f"StatementFormat({self.name!r})"
+
+
+_formats = []
+
+
+def register(name: str, container: str, sniff, parse, iter_batches=None) -> StatementFormat:
+    """Add a format (replacing any with the same name). Ties in sniff() scores go
+    to the format registered first."""
+    fmt = StatementFormat(name, container, sniff, parse, iter_batches)
+    for i, existing in enumerate(_formats):
+        if existing.name == name:
+            _formats[i] = fmt
+            return fmt
+    _formats.append(fmt)
+    return fmt
+
+
+def registered(container: str = None):
+    return [f for f in _formats if container is None or f.container == container]
+
+
+def detect(container: str, first_bytes: bytes, first_page_text):
+    """The best-scoring format for this container, or None if none scores above 0.
+
+    ``first_page_text`` may be a zero-argument callable; it is only called when two
+    or more formats compete, since extracting a PDF page costs as much as parsing
+    one. A lone candidate is returned without sniffing."""
+    candidates = registered(container)
+    if len(candidates) == 1:
+        return candidates[0]
+    if callable(first_page_text):
+        first_page_text = first_page_text()
+    best, best_score = None, 0.0
+    for fmt in candidates:
+        try:
+            score = fmt.sniff(first_bytes, first_page_text)
+        except Exception as e:
+            logger.warning(f"Format sniffer {fmt.name} failed: {e}")
+            continue
+        if score > best_score:
+            best, best_score = fmt, score
+    return best
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import tempfile
+from starlette.responses import JSONResponse
+
+# Statement uploads are copied to a temp file in fixed-size chunks while being
+# hashed, so no request ever holds the whole file as one bytes object. Parsers
+# (and the background import queue) then work from the file's path.
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(256 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+
+
+class UploadTooLarge(ValueError):
+    """The upload is bigger than UPLOAD_MAX_BYTES."""
+
+
+def _too_large_message():
+    return f"File is larger than the {UPLOAD_MAX_BYTES // (1024 * 1024)} MB upload limit"
+
+
+def spool_upload(source, suffix: str = ""):
+    """Copy a binary file object to a temp file chunk by chunk, hashing as it goes.
+    Returns (path, sha256 hex, size); the caller removes the file. Raises
+    UploadTooLarge as soon as more than UPLOAD_MAX_BYTES have been read."""
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=suffix, dir=UPLOAD_SPOOL_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if UPLOAD_MAX_BYTES > 0 and size > UPLOAD_MAX_BYTES:
+                    raise UploadTooLarge(_too_large_message())
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        discard(path)
+        raise
+    return path, digest.hexdigest(), size
+
+
+def discard(path):
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class UploadSizeLimit:
+    """ASGI middleware that rejects oversized request bodies on the given paths with
+    413 before they are buffered: up front from Content-Length, or after the first
+    chunks past the limit for chunked uploads. Multipart parsing otherwise spools
+    the whole body before the endpoint runs."""
+
+    def __init__(self, app, paths=(), max_bytes: int = None):
+        self.app = app
+        self.paths = tuple(paths)
+        self.max_bytes = UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.max_bytes <= 0 or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        # Multipart framing adds a little on top of the file itself
+        limit = self.max_bytes + 64 * 1024
+        headers = dict(scope.get("headers") or ())
+        length = headers.get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > limit:
+            await self._reject(scope, receive, send)
+            return
+
+        state = {"received": 0, "too_large": False, "started": False}
+
+        async def limited_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["received"] += len(message.get("body", b""))
+                if state["received"] > limit:
+                    state["too_large"] = True
+                    raise UploadTooLarge(_too_large_message())
+            return message
+
+        async def guarded_send(message):
+            # Whatever the app makes of the aborted body, the client gets the 413
+            if state["too_large"]:
+                return
+            if message["type"] == "http.response.start":
+                state["started"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLarge:
+            if state["started"]:
+                raise
+        if state["too_large"] and not state["started"]:
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        response = JSONResponse({"detail": _too_large_message()}, status_code=413, headers={"Connection": "close"})
+        await response(scope, receive, send)
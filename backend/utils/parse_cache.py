@@ -0,0 +1,113 @@
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from utils.parser import PARSER_VERSION
+
+# On-disk cache of parsed statements, shared by all users: an identical file
+# is only run through pdfplumber once.
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR", "./parse_cache")
+PARSE_CACHE_MAX_BYTES = int(os.getenv("PARSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+PARSE_CACHE_MAX_AGE_DAYS = float(os.getenv("PARSE_CACHE_MAX_AGE_DAYS", "30"))
+
+logger = logging.getLogger(__name__)
+_evict_lock = threading.Lock()
+
+
+def _path(content_sha256: str) -> str:
+    # The parser is picked from the file's content, so the hash and parser version identify the result
+    return os.path.join(PARSE_CACHE_DIR, f"{content_sha256}-v{PARSER_VERSION}.json.gz")
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Unserializable {type(value).__name__}")
+
+
+def get(content_sha256: str):
+    """Cached transactions for this file, or None. Hits refresh the entry's age."""
+    if not content_sha256 or PARSE_CACHE_MAX_BYTES <= 0:
+        return None
+    path = _path(content_sha256)
+    try:
+        if time.time() - os.path.getmtime(path) > PARSE_CACHE_MAX_AGE_DAYS * 86400:
+            os.remove(path)
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            transactions = json.load(f)
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Discarding unreadable parse cache entry {path}: {e}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    for txn in transactions:
+        if txn.get("date"):
+            txn["date"] = datetime.fromisoformat(txn["date"])
+    return transactions
+
+
+def put(content_sha256: str, transactions):
+    """Store a parse result, then evict by age and total size. Empty results are not cached."""
+    if not content_sha256 or not transactions or PARSE_CACHE_MAX_BYTES <= 0:
+        return
+    path = _path(content_sha256)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(PARSE_CACHE_DIR, exist_ok=True)
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(transactions, f, default=_encode)
+        os.replace(tmp, path)
+    except (OSError, TypeError) as e:
+        logger.warning(f"Could not write parse cache entry {path}: {e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return
+    evict()
+
+
+def evict():
+    """Drop entries older than PARSE_CACHE_MAX_AGE_DAYS, then least recently used
+    ones until the cache fits in PARSE_CACHE_MAX_BYTES."""
+    with _evict_lock:
+        now = time.time()
+        entries = []
+        try:
+            names = os.listdir(PARSE_CACHE_DIR)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not name.endswith(".json.gz"):
+                continue
+            path = os.path.join(PARSE_CACHE_DIR, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if now - st.st_mtime > PARSE_CACHE_MAX_AGE_DAYS * 86400:
+                _discard(path)
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= PARSE_CACHE_MAX_BYTES:
+                break
+            _discard(path)
+            total -= size
+
+
+def _discard(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -1,9 +1,62 @@
 import pdfplumber
 import pandas as pd
+import asyncio
+import gc
 import hashlib
+import multiprocessing
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 import io
+import os
 import re
+from contextlib import contextmanager
+from itertools import chain, islice
+from utils import formats
+from utils.dateparse import DateParser, default_date_parser
+
+# Parallel PDF extraction: number of worker processes (1 = serial) and the
+# minimum page count before fanning out is worth the process start-up cost.
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", "1"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+
+# PDF resource limits: statements with more pages are rejected up front, and
+# extraction aborts if the process grows by more than the RSS budget (0 = off).
+# The budget is only enforced in parse pool workers: in the web process, memory
+# used by concurrent requests would count against the PDF.
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "2000"))
+PDF_RSS_BUDGET_MB = int(os.getenv("PDF_RSS_BUDGET_MB", "256"))
+
+# PDF extraction strategy is decided per document from its first pages (at most
+# PDF_LAYOUT_PROBE_PAGES) and remembered per layout fingerprint, so later
+# statements from the same template skip the probe.
+PDF_LAYOUT_PROBE_PAGES = 2
+PDF_LAYOUT_CACHE_SIZE = int(os.getenv("PDF_LAYOUT_CACHE_SIZE", "256"))
+PDF_STRATEGY_TABLE = "table"
+PDF_STRATEGY_TEXT = "text"
+# Column header words whose x-positions go into the layout fingerprint
+PDF_HEADER_WORDS = frozenset((
+    "date", "remarks", "withdrawal", "deposit", "balance", "particulars",
+    "narration", "description", "debit", "credit", "amount", "cheque",
+))
+
+# Part of the parse cache key (utils/parse_cache.py): bump whenever the parsers
+# produce different transactions for the same file.
+PARSER_VERSION = 2
+
+# Bytes read from the start of a file to pick its statement format
+FORMAT_SNIFF_BYTES = 8 * 1024
+
+# Upload parsing: size of the long-lived process pool that parses uploaded
+# statements off the event loop (0 = parse in a thread instead).
+STATEMENT_PARSE_PROCESSES = int(os.getenv("STATEMENT_PARSE_PROCESSES", "2"))
+
+class StatementTooLarge(ValueError):
+    """The statement exceeds a configured size, page or memory limit."""
+
 
 ICICI_TX_ROW_RE = re.compile(
     r"^(?P<serial>\d+)\s+(?P<date>\d{1,2}[./-]\d{1,2}[./-]\d{4})(?:\s+(?P<description>.*?))?\s+(?P<amount>[0-9,]+(?:\.\d{1,2})?)\s+(?P<balance>[0-9,]+(?:\.\d{1,2})?)$"
@@ -14,6 +67,8 @@ ICICI_TX_HEAD_RE = re.compile(
     re.IGNORECASE,
 )
 
+TEXT_LINE_DATE_RE = re.compile(r"^(\d{1,2}[\-/]\d{1,2}[\-/]\d{4})")
+
 ICICI_NOISE_PREFIXES = (
     "statement of transactions",
     "your base branch:",
@@ -136,108 +191,375 @@ def parse_amount(amount_str):
     except ValueError:
         return 0.0
 
-def parse_date(date_str):
+def parse_date(date_str, date_parser: DateParser = None):
+    """Parse a statement date string (DD/MM/YYYY, DD-MM-YYYY, DD.MM.YYYY, YYYY-MM-DD,
+    DD-Mon-YYYY, or unpadded variants); returns None when nothing fits."""
     if not isinstance(date_str, str):
         return None
-    # Clean the date string
-    date_str = date_str.strip()
-    # Try common formats including the ICICI format like "1/10/2025", "2/10/2025", "13-10-2025"
-    formats = ['%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y-%m-%d', '%d-%b-%Y', '%-d/%-m/%Y', '%-d-%-m-%Y']
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str, fmt)
-        except ValueError:
-            continue
-    
-    # Try without leading zeros
-    try:
-        parts = re.split(r'[./-]', date_str)
-        if len(parts) == 3:
-            day, month, year = parts
-            return datetime(int(year), int(month), int(day))
-    except:
-        pass
-    
+    return (date_parser or default_date_parser).parse(date_str)
+
+def _extract_pdf_table_transactions(page):
+    """Transactions from the page's table, if it has one with usable cells."""
+    table = page.extract_table()
+    page_transactions = []
+    if table:
+        # Try the structured table path first for PDFs that expose clean cells.
+        header_row = None
+        for row in table:
+            if row and any("Withdrawal" in str(c) for c in row):
+                header_row = row
+                break
+        if header_row:
+            col_map = {name: idx for idx, name in enumerate(header_row)}
+            date_idx = col_map.get('Value Date', col_map.get('Transaction Date', 1))
+            desc_idx = col_map.get('Transaction Remarks', 4)
+            withdrawal_idx = col_map.get('Withdrawal\nAmount(INR)', col_map.get('Withdrawal Amount(INR)', 5))
+            deposit_idx = col_map.get('Deposit\nAmount(INR)', col_map.get('Deposit Amount(INR)', 6))
+        else:
+            date_idx, desc_idx, withdrawal_idx, deposit_idx = 1, 4, 5, 6
+
+        for row in table:
+            if not row or row == header_row:
+                continue
+            if date_idx >= len(row) or desc_idx >= len(row):
+                continue
+            if not row[date_idx] or not row[desc_idx]:
+                continue
+            date_val = parse_date(str(row[date_idx]))
+            description = str(row[desc_idx]).replace('\n', ' ').strip()
+            withdrawals = parse_amount(row[withdrawal_idx]) if withdrawal_idx < len(row) else 0.0
+            deposits = parse_amount(row[deposit_idx]) if deposit_idx < len(row) else 0.0
+            if withdrawals > 0 and description and date_val:
+                page_transactions.append({
+                    "date": date_val,
+                    "description": description,
+                    "amount": withdrawals,
+                    "source": "ICICI PDF"
+                })
+            if deposits > 0 and description and date_val:
+                page_transactions.append({
+                    "date": date_val,
+                    "description": description,
+                    "amount": -deposits,
+                    "source": "ICICI PDF"
+                })
+
+    return page_transactions
+
+
+def _has_icici_text_rows(text: str) -> bool:
+    return any(ICICI_TX_ROW_RE.match(_normalize_pdf_line(line)) for line in text.splitlines())
+
+
+def _extract_pdf_page(page, strategy: str = None):
+    """Extract one page: (table transactions, None) if the table path worked, else ([], page text).
+
+    Without a ``strategy`` (or with PDF_STRATEGY_TABLE) the table is tried first and
+    the text used when it yields nothing. PDF_STRATEGY_TEXT goes straight to the
+    text, and only tries the table on a page whose text has no transaction rows."""
+    if strategy == PDF_STRATEGY_TEXT:
+        text = page.extract_text() or ""
+        if _has_icici_text_rows(text):
+            return [], text
+        page_transactions = _extract_pdf_table_transactions(page)
+        return (page_transactions, None) if page_transactions else ([], text)
+    page_transactions = _extract_pdf_table_transactions(page)
+    if page_transactions:
+        return page_transactions, None
+    return [], page.extract_text() or ""
+
+
+def _layout_fingerprint(pdf, page) -> str:
+    """Identify a statement template from its producer metadata, page size and the
+    column header words on the first page with their (rounded) x-positions."""
+    metadata = pdf.metadata or {}
+    columns = {}
+    for word in page.extract_words():
+        key = word["text"].strip(":.()").lower()
+        if key in PDF_HEADER_WORDS and key not in columns:
+            columns[key] = round(word["x0"] / 10)
+    parts = [
+        str(metadata.get("Producer", "")),
+        str(metadata.get("Creator", "")),
+        f"{round(page.width)}x{round(page.height)}",
+    ] + [f"{key}@{x}" for key, x in sorted(columns.items())]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def _result_strategy(result):
+    """Which extraction path a page's result came from, or None if the page had no rows."""
+    page_transactions, page_text = result
+    if page_transactions:
+        return PDF_STRATEGY_TABLE
+    if page_text and _has_icici_text_rows(page_text):
+        return PDF_STRATEGY_TEXT
     return None
 
-def parse_pdf(file_content: bytes):
+
+class _LayoutCache:
+    """Thread-safe LRU of layout fingerprint -> extraction strategy (process-local)."""
+
+    def __init__(self, maxsize=PDF_LAYOUT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, fingerprint):
+        with self._lock:
+            strategy = self._entries.get(fingerprint)
+            if strategy is not None:
+                self._entries.move_to_end(fingerprint)
+            return strategy
+
+    def put(self, fingerprint, strategy):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[fingerprint] = strategy
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+pdf_layout_cache = _LayoutCache()
+
+
+class _PdfLayout:
+    """Per-document extraction strategy. The first page's fingerprint is looked up in
+    pdf_layout_cache; on a miss the first pages get the full table-then-text pass
+    until one shows which path the statement needs. Every later page runs only that
+    path (with _extract_pdf_page's per-page fallback)."""
+
+    def __init__(self, pdf):
+        self.pdf = pdf
+        self.strategy = None
+        self.fingerprint = None
+        self.probing = True
+
+    def extract(self, page):
+        if self.fingerprint is None:
+            self.fingerprint = _layout_fingerprint(self.pdf, page)
+            self.strategy = pdf_layout_cache.get(self.fingerprint)
+            self.probing = self.strategy is None
+        result = _extract_pdf_page(page, self.strategy)
+        if self.probing:
+            strategy = _result_strategy(result)
+            if strategy is not None:
+                self.strategy = strategy
+                self.probing = False
+                pdf_layout_cache.put(self.fingerprint, strategy)
+            elif page.page_number >= PDF_LAYOUT_PROBE_PAGES:
+                self.probing = False  # undecided: keep trying both paths per page
+        return result
+
+
+
+
+def _pdf_input(source):
+    """What pdfplumber.open() should read: bytes are wrapped (no copy), while paths
+    and seekable binary files (e.g. a spooled upload) are read from directly."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+def _rss_bytes():
+    """Current resident set size, or None where /proc isn't available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+# Set by the pool initializers: this process only ever runs parses
+_in_pool_worker = False
+
+
+def _mark_pool_worker():
+    global _in_pool_worker
+    _in_pool_worker = True
+
+
+class _PageBudget:
+    """Aborts extraction once RSS has grown PDF_RSS_BUDGET_MB past its starting point.
+    A no-op outside pool workers, where PDF_MAX_PAGES is the only limit."""
+
+    def __init__(self):
+        self.limit = PDF_RSS_BUDGET_MB * 1024 * 1024
+        self.start = _rss_bytes() if self.limit > 0 and _in_pool_worker else None
+
+    def check(self, page_number):
+        if self.start is None:
+            return
+        if _rss_bytes() - self.start <= self.limit:
+            return
+        gc.collect()
+        grown = _rss_bytes() - self.start
+        if grown > self.limit:
+            raise StatementTooLarge(
+                f"PDF extraction used {grown // (1024 * 1024)} MB by page {page_number} "
+                f"(budget {PDF_RSS_BUDGET_MB} MB)"
+            )
+
+
+def _check_page_count(num_pages: int):
+    if PDF_MAX_PAGES > 0 and num_pages > PDF_MAX_PAGES:
+        raise StatementTooLarge(f"PDF has {num_pages} pages (limit {PDF_MAX_PAGES})")
+
+
+def _extract_pdf_page_range(source, start: int, end: int, strategy: str = None):
+    """Pool worker: open the PDF once and extract pages [start, end)."""
+    budget = _PageBudget()
+    results = []
+    with pdfplumber.open(_pdf_input(source)) as pdf:
+        for i in range(start, end):
+            page = pdf.pages[i]
+            results.append(_extract_pdf_page(page, strategy))
+            page.close()
+            budget.check(i + 1)
+    return results
+
+
+def _extract_pdf_pages_parallel(source, num_pages: int, workers: int, progress=None, first: int = 0, strategy: str = None):
+    """Fan contiguous ranges of pages [first, num_pages) out to a process pool; results
+    come back in page order."""
+    chunk = -(-(num_pages - first) // workers)
+    ranges = [(start, min(start + chunk, num_pages)) for start in range(first, num_pages, chunk)]
+    with ProcessPoolExecutor(max_workers=len(ranges), initializer=_mark_pool_worker) as pool:
+        futures = [pool.submit(_extract_pdf_page_range, source, start, end, strategy) for start, end in ranges]
+        for (start, end), future in zip(ranges, futures):
+            results = future.result()
+            if progress:
+                progress(end, num_pages)
+            yield from results
+
+
+def _extract_pdf_pages_serial(pdf, progress=None):
+    """Extract pages in order, dropping each page's layout objects once it is done
+    so memory stays flat however long the statement is."""
+    budget = _PageBudget()
+    layout = _PdfLayout(pdf)
+    num_pages = len(pdf.pages)
+    for i, page in enumerate(pdf.pages):
+        result = layout.extract(page)
+        page.close()
+        budget.check(i + 1)
+        if progress:
+            progress(i + 1, num_pages)
+        yield result
+
+
+def _assemble_pdf_transactions(page_results, transactions):
+    """Feed per-page extraction results, in page order, through the ICICI text state machine."""
+    current_tx = None
+    previous_balance = None
+    for page_transactions, page_text in page_results:
+        if page_transactions:
+            transactions.extend(page_transactions)
+            continue
+        current_tx, previous_balance = _parse_icici_pdf_text(page_text, transactions, current_tx, previous_balance)
+    _finalize_icici_pdf_transaction(current_tx, transactions, previous_balance)
+    return transactions
+
+
+def parse_pdf(file_content, workers: int = None, progress=None):
+    """Parse an ICICI PDF statement from bytes, a path, or a seekable binary file.
+
+    With ``workers`` > 1 (default: PDF_PARSE_WORKERS) and at least PDF_PARALLEL_MIN_PAGES
+    pages, page extraction runs in a process pool (bytes and paths only). Line parsing
+    always happens here, in page order, so the output matches the serial path exactly.
+    The first pages are extracted here to pick the table or text strategy (see
+    _PdfLayout), and the workers get the rest.
+
+    ``progress(pages_done, pages_total)`` is called as pages are extracted. Raises
+    StatementTooLarge past PDF_MAX_PAGES or, in a pool worker, PDF_RSS_BUDGET_MB.
+    """
+    if workers is None:
+        workers = PDF_PARSE_WORKERS
+    if hasattr(file_content, "seek"):
+        workers = 1  # open file handles can't be shipped to pool workers
     transactions = []
     try:
-        current_tx = None
-        previous_balance = None
-        with pdfplumber.open(io.BytesIO(file_content)) as pdf:
+        with pdfplumber.open(_pdf_input(file_content)) as pdf:
+            num_pages = len(pdf.pages)
+            _check_page_count(num_pages)
+            if workers <= 1 or num_pages < PDF_PARALLEL_MIN_PAGES:
+                return _assemble_pdf_transactions(_extract_pdf_pages_serial(pdf, progress), transactions)
+            # Settle the extraction strategy here, then hand the rest to the workers
+            layout = _PdfLayout(pdf)
+            head = []
             for page in pdf.pages:
-                table = page.extract_table()
-                page_transactions = []
-                if table:
-                    # Try the structured table path first for PDFs that expose clean cells.
-                    header_row = None
-                    for row in table:
-                        if row and any("Withdrawal" in str(c) for c in row):
-                            header_row = row
-                            break
-                    if header_row:
-                        col_map = {name: idx for idx, name in enumerate(header_row)}
-                        date_idx = col_map.get('Value Date', col_map.get('Transaction Date', 1))
-                        desc_idx = col_map.get('Transaction Remarks', 4)
-                        withdrawal_idx = col_map.get('Withdrawal\nAmount(INR)', col_map.get('Withdrawal Amount(INR)', 5))
-                        deposit_idx = col_map.get('Deposit\nAmount(INR)', col_map.get('Deposit Amount(INR)', 6))
-                    else:
-                        date_idx, desc_idx, withdrawal_idx, deposit_idx = 1, 4, 5, 6
-
-                    for row in table:
-                        if not row or row == header_row:
-                            continue
-                        if date_idx >= len(row) or desc_idx >= len(row):
-                            continue
-                        if not row[date_idx] or not row[desc_idx]:
-                            continue
-                        date_val = parse_date(str(row[date_idx]))
-                        description = str(row[desc_idx]).replace('\n', ' ').strip()
-                        withdrawals = parse_amount(row[withdrawal_idx]) if withdrawal_idx < len(row) else 0.0
-                        deposits = parse_amount(row[deposit_idx]) if deposit_idx < len(row) else 0.0
-                        if withdrawals > 0 and description and date_val:
-                            page_transactions.append({
-                                "date": date_val,
-                                "description": description,
-                                "amount": withdrawals,
-                                "source": "ICICI PDF"
-                            })
-                        if deposits > 0 and description and date_val:
-                            page_transactions.append({
-                                "date": date_val,
-                                "description": description,
-                                "amount": -deposits,
-                                "source": "ICICI PDF"
-                            })
-
-                if page_transactions:
-                    transactions.extend(page_transactions)
-                    continue
-
-                page_text = page.extract_text() or ""
-                current_tx, previous_balance = _parse_icici_pdf_text(page_text, transactions, current_tx, previous_balance)
-
-        previous_balance = _finalize_icici_pdf_transaction(current_tx, transactions, previous_balance)
+                head.append(layout.extract(page))
+                page.close()
+                if not layout.probing:
+                    break
+            if progress:
+                progress(len(head), num_pages)
+
+        try:
+            page_results = head
+            if len(head) < num_pages:
+                page_results += list(_extract_pdf_pages_parallel(
+                    file_content, num_pages, min(workers, num_pages - len(head)), progress, len(head), layout.strategy
+                ))
+        except StatementTooLarge:
+            raise
+        except Exception as e:
+            print(f"Parallel PDF extraction failed, falling back to serial: {e}")
+            with pdfplumber.open(_pdf_input(file_content)) as pdf:
+                return _assemble_pdf_transactions(_extract_pdf_pages_serial(pdf, progress), transactions)
+        _assemble_pdf_transactions(page_results, transactions)
+    except StatementTooLarge:
+        raise
     except Exception as e:
         print(f"Error parsing PDF: {e}")
         import traceback
         traceback.print_exc()
     return transactions
 
-def _parse_text_lines_icici(text: str):
-    """Parse ICICI-like statement text with columns: DATE, MODE, PARTICULARS, DEPOSITS, WITHDRAWALS, BALANCE."""
-    transactions = []
-    lines = text.splitlines()
-    for raw in lines:
+@contextmanager
+def _text_lines(source):
+    """Iterate the lines of a text statement held as bytes, a path or a seekable binary
+    file. Files are decoded and read a line at a time, never as one string."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield iter(bytes(source).decode('utf-8', errors='ignore').splitlines())
+        return
+    if hasattr(source, "seek"):
+        source.seek(0)
+        text = io.TextIOWrapper(source, encoding='utf-8', errors='ignore')
+        try:
+            yield text
+        finally:
+            text.detach()  # leave the caller's file open
+        return
+    with open(source, encoding='utf-8', errors='ignore') as text:
+        yield text
+
+
+def _parse_text_lines_icici(lines):
+    """Parse ICICI-like statement text with columns: DATE, MODE, PARTICULARS, DEPOSITS, WITHDRAWALS, BALANCE.
+    ``lines`` is the text as one string or any iterable of lines (e.g. an open file)."""
+    return list(_iter_text_transactions(lines))
+
+
+def _iter_text_transactions(lines):
+    """Generator behind _parse_text_lines_icici(); consumes ``lines`` lazily."""
+    lines = iter(lines.splitlines()) if isinstance(lines, str) else iter(lines)
+    head = list(islice(lines, 200))
+    sample = (m.group(1) for m in (TEXT_LINE_DATE_RE.match(line.strip()) for line in head) if m)
+    date_parser = DateParser.sniff(sample)
+    for raw in chain(head, lines):
         line = raw.strip()
         if not line or line.lower().startswith("date"):
             continue
-        m = re.match(r"^(\d{1,2}[\-/]\d{1,2}[\-/]\d{4})", line)
+        m = TEXT_LINE_DATE_RE.match(line)
         if not m:
             continue
         date_str = m.group(1)
-        date_val = parse_date(date_str)
+        date_val = parse_date(date_str, date_parser)
         if not date_val:
             continue
         # Try tab, then 2+ spaces, then single space
@@ -260,93 +582,392 @@ def _parse_text_lines_icici(text: str):
         else:
             continue
         if withdrawals > 0 and description:
-            transactions.append({
+            yield {
                 "date": date_val,
                 "description": description,
                 "amount": withdrawals,
                 "source": "ICICI CSV"
-            })
-    return transactions
+            }
+
+# Date formats parse_date tries first; the CSV path detects one of these per column.
+CSV_DATE_FORMATS = ['%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y-%m-%d', '%d-%b-%Y']
+CSV_DATE_SAMPLE_ROWS = 200
+# CSVs are read CSV_CHUNK_ROWS rows at a time with a dialect sniffed from the
+# first CSV_SNIFF_BYTES, so memory doesn't grow with the file.
+CSV_SNIFF_BYTES = int(os.getenv("CSV_SNIFF_BYTES", str(64 * 1024)))
+CSV_CHUNK_ROWS = max(int(os.getenv("CSV_CHUNK_ROWS", "5000")), CSV_DATE_SAMPLE_ROWS)
+# Separators tried in order; the first giving at least two columns wins
+CSV_READ_ATTEMPTS = (
+    {},
+    {"sep": None, "engine": "python"},
+    {"sep": ","},
+    {"sep": "\t"},
+    {"sep": r"\s+", "engine": "python"},
+)
+
+
+def _csv_text(col):
+    """str() every cell, like the per-row path did (missing values become 'nan')."""
+    return col.astype(object).map(str)
+
+
+def _csv_amounts(col):
+    """Column-wise parse_amount: numbers pass through, strings lose commas / ₹, junk becomes 0."""
+    if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+        return col.astype(float)
+    values = pd.to_numeric(col, errors='coerce').astype(float)
+    # Only cells that aren't plain numbers pay for the string clean-up
+    misses = values.isna() & col.notna()
+    if misses.any():
+        cleaned = _csv_text(col[misses]).str.replace(',', '', regex=False).str.replace('₹', '', regex=False).str.strip()
+        values[misses] = pd.to_numeric(cleaned, errors='coerce')
+    return values.fillna(0.0)
+
+
+def _csv_date_format(raw):
+    """The CSV_DATE_FORMATS entry matching most of the first CSV_DATE_SAMPLE_ROWS values."""
+    sample = raw.head(CSV_DATE_SAMPLE_ROWS)
+    best_fmt, best_hits = None, 0
+    for fmt in CSV_DATE_FORMATS:
+        hits = pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum()
+        if hits > best_hits:
+            best_fmt, best_hits = fmt, hits
+    return best_fmt
+
+
+def _csv_dates(col, date_format=None):
+    """Column-wise parse_date: detect the format from a sample (unless ``date_format``
+    is given as a 1-tuple), parse the column in one pd.to_datetime call and only send
+    the misses through parse_date. Returns a list of datetime / None."""
+    raw = _csv_text(col).str.strip()
+    best_fmt = date_format[0] if date_format else _csv_date_format(raw)
+    date_parser = DateParser(best_fmt)
+    if best_fmt is None:
+        return [parse_date(v, date_parser) for v in raw.tolist()]
+    parsed = pd.to_datetime(raw, format=best_fmt, errors='coerce')
+    dates = list(parsed.dt.to_pydatetime())
+    for i in parsed.isna().to_numpy().nonzero()[0]:
+        dates[i] = parse_date(raw.iat[i], date_parser)
+    return dates
+
+
+def _csv_columns(columns):
+    """Map normalized header names to (date, withdrawal, deposit, description, mode) columns."""
+    date_col = next((c for c in columns if 'date' in c), None)
+    withdraw_col = next((c for c in columns if 'withdrawal' in c or 'withdrawals' in c or 'debit' in c), None)
+    deposit_col = next((c for c in columns if 'deposit' in c or 'credit' in c), None)
+    desc_col = next((c for c in columns if 'particulars' in c or 'description' in c or 'narration' in c or 'remarks' in c), None)
+    mode_col = next((c for c in columns if 'mode' in c), None)
+    return date_col, withdraw_col, deposit_col, desc_col, mode_col
+
+
+def _csv_frame_to_transactions(df, date_format=None):
+    """Build debit and credit rows from a statement DataFrame with column operations.
+    Returns parallel (dates, descriptions, amounts) lists in emit order."""
+    date_col, withdraw_col, deposit_col, desc_col, mode_col = _csv_columns(df.columns)
+    if not date_col:
+        return [], [], []
+
+    dates = _csv_dates(df[date_col], date_format)
+    zeros = pd.Series(0.0, index=df.index)
+    withdrawals = _csv_amounts(df[withdraw_col]) if withdraw_col else zeros
+    deposits = _csv_amounts(df[deposit_col]) if deposit_col else zeros
+    description = _csv_text(df[desc_col]).str.strip() if desc_col else pd.Series("", index=df.index, dtype=object)
+    if mode_col:
+        # If mode column exists, prepend it to the description for more context
+        has_mode = df[mode_col].astype(object).map(bool)
+        with_mode = (_csv_text(df[mode_col]) + " " + description).str.strip()
+        description = description.where(~has_mode, with_mode)
+
+    keep = pd.Series([d is not None and d is not pd.NaT for d in dates], index=df.index) & (description != "")
+    debit_rows = (keep & (withdrawals > 0)).to_numpy().nonzero()[0]
+    credit_rows = (keep & (deposits > 0)).to_numpy().nonzero()[0]
+    # Each statement row emits its debit before its credit, rows stay in file order
+    order = sorted([(r, 0) for r in debit_rows.tolist()] + [(r, 1) for r in credit_rows.tolist()])
+    rows = [r for r, _ in order]
+    desc_values = description.tolist()
+    withdraw_values = withdrawals.tolist()
+    deposit_values = deposits.tolist()
+    return (
+        [dates[r] for r in rows],
+        [desc_values[r] for r in rows],
+        [withdraw_values[r] if kind == 0 else -deposit_values[r] for r, kind in order],
+    )
+
+
+def _csv_input(source):
+    """What pd.read_csv() should read for each attempt: bytes are wrapped (no copy),
+    binary files are rewound, paths are reopened by pandas."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+def _read_head(source, num_bytes: int) -> bytes:
+    """The first ``num_bytes`` of bytes, a path or a seekable binary file."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source[:num_bytes])
+    if hasattr(source, "seek"):
+        source.seek(0)
+        return source.read(num_bytes)
+    with open(source, "rb") as f:
+        return f.read(num_bytes)
+
+
+def _csv_sample(source) -> bytes:
+    """The first CSV_SNIFF_BYTES of the file, cut back to the last complete line."""
+    head = _read_head(source, CSV_SNIFF_BYTES + 1)
+    if len(head) > CSV_SNIFF_BYTES and b"\n" in head:
+        head = head[:head.rindex(b"\n") + 1]
+    return head
+
+
+def _sniff_csv(source):
+    """Pick the read_csv options from the start of the file: the first of
+    CSV_READ_ATTEMPTS that gives at least two columns, including a date column.
+    Returns None when the file doesn't look like a statement CSV."""
+    sample = _csv_sample(source)
+    for kwargs in CSV_READ_ATTEMPTS:
+        try:
+            df = pd.read_csv(io.BytesIO(sample), **kwargs)
+        except Exception:
+            continue
+        if df.shape[1] >= 2:
+            columns = df.columns.astype(str).str.strip().str.lower()
+            return kwargs if _csv_columns(columns)[0] else None
+    return None
+
+
+def iter_csv_batches(file_content, chunk_rows: int = None):
+    """Stream a CSV statement (bytes, a path or a seekable binary file) as lists of
+    transaction dicts, one per ``chunk_rows`` (default CSV_CHUNK_ROWS) file rows.
+
+    The dialect and column mapping are sniffed from the first CSV_SNIFF_BYTES and
+    the file is read in chunks, so memory depends on the chunk size, not the file.
+    Malformed rows are skipped. Files that don't parse as a statement CSV are
+    streamed through the plain-text parser instead."""
+    chunk_rows = chunk_rows or CSV_CHUNK_ROWS
+    kwargs = _sniff_csv(file_content)
+    found = False
+    if kwargs is not None:
+        # One date format for the whole file, detected from its first rows
+        date_format = None
+        with pd.read_csv(_csv_input(file_content), chunksize=chunk_rows, on_bad_lines="skip",
+                         encoding_errors="ignore", **kwargs) as reader:
+            for df in reader:
+                df.columns = df.columns.astype(str).str.strip().str.lower()
+                if date_format is None:
+                    date_format = (_csv_date_format(_csv_text(df[_csv_columns(df.columns)[0]]).str.strip()),)
+                dates, descriptions, amounts = _csv_frame_to_transactions(df, date_format)
+                if dates:
+                    found = True
+                    yield [
+                        {"date": d, "description": desc, "amount": amt, "source": "ICICI CSV"}
+                        for d, desc, amt in zip(dates, descriptions, amounts)
+                    ]
+    if not found:
+        # Fallback to manual text parsing if no transactions found
+        yield from _iter_text_batches(file_content, chunk_rows)
 
-def parse_csv(file_content: bytes):
+
+def _iter_text_batches(file_content, chunk_rows: int = None):
+    """The plain-text parser's transactions in lists of ``chunk_rows``."""
+    chunk_rows = chunk_rows or CSV_CHUNK_ROWS
+    with _text_lines(file_content) as lines:
+        rows = _iter_text_transactions(lines)
+        while True:
+            batch = list(islice(rows, chunk_rows))
+            if not batch:
+                break
+            yield batch
+
+
+def parse_csv(file_content, as_frame: bool = False):
+    """Parse a CSV statement (bytes, a path or a seekable binary file) into transaction
+    dicts, or a DataFrame with the same columns when ``as_frame`` is set."""
     transactions = []
     try:
-        df = None
-        for kwargs in (
-            {},
-            {"sep": None, "engine": "python"},
-            {"sep": ","},
-            {"sep": "\t"},
-            {"sep": r"\s+", "engine": "python"},
-        ):
-            try:
-                df = pd.read_csv(io.BytesIO(file_content), **kwargs)
-                if df is not None and df.shape[1] >= 2:
-                    break
-            except Exception:
-                df = None
-
-        if df is not None and not df.empty:
-            df.columns = df.columns.astype(str).str.strip().str.lower()
-            date_col = next((c for c in df.columns if 'date' in c), None)
-            withdraw_col = next((c for c in df.columns if 'withdrawal' in c or 'withdrawals' in c or 'debit' in c), None)
-            deposit_col = next((c for c in df.columns if 'deposit' in c or 'credit' in c), None)
-            desc_col = next((c for c in df.columns if 'particulars' in c or 'description' in c or 'narration' in c or 'remarks' in c), None)
-            mode_col = next((c for c in df.columns if 'mode' in c), None)
-            for _, row in df.iterrows():
-                date_val = parse_date(str(row.get(date_col, ""))) if date_col else None
-                if not date_val:
-                    continue
-                withdrawals = parse_amount(row.get(withdraw_col, 0)) if withdraw_col else 0.0
-                deposits = parse_amount(row.get(deposit_col, 0)) if deposit_col else 0.0
-                description = str(row.get(desc_col, "")).strip() if desc_col else ""
-                # If mode column exists, append it to description for more context
-                if mode_col and row.get(mode_col):
-                    description = f"{row.get(mode_col)} {description}".strip()
-                if withdrawals > 0 and description:
-                    transactions.append({
-                        "date": date_val,
-                        "description": description,
-                        "amount": withdrawals,
-                        "source": "ICICI CSV"
-                    })
-                if deposits > 0 and description:
-                    transactions.append({
-                        "date": date_val,
-                        "description": description,
-                        "amount": -deposits,
-                        "source": "ICICI CSV"
-                    })
-        # Fallback to manual text parsing if no transactions found
-        if not transactions:
-            try:
-                text = io.BytesIO(file_content).read().decode('utf-8', errors='ignore')
-            except Exception:
-                text = file_content.decode('latin-1', errors='ignore')
-            transactions = _parse_text_lines_icici(text)
+        for batch in iter_csv_batches(file_content):
+            transactions.extend(batch)
     except Exception as e:
         print(f"Error parsing CSV: {e}")
         import traceback
         traceback.print_exc()
+    if as_frame:
+        return pd.DataFrame(transactions, columns=["date", "description", "amount", "source"])
     return transactions
 
-def parse_statement(file_content: bytes, filename: str):
-    name = filename.lower()
-    if name.endswith('.pdf'):
-        return parse_pdf(file_content)
-    if name.endswith('.csv'):
-        txns = parse_csv(file_content)
-        if txns:
-            return txns
-        # Fallback to text
-        try:
-            text = io.BytesIO(file_content).read().decode('utf-8', errors='ignore')
-        except Exception:
-            text = file_content.decode('latin-1', errors='ignore')
-        return _parse_text_lines_icici(text)
-    # Generic fallback for unknown extensions
+# ---------------------------------------------------------------------------
+# Statement formats (see utils/formats.py). Each sniffer scores the start of a
+# file; only the winning format's parser runs.
+
+def _sniff_icici_pdf(first_bytes: bytes, first_page_text: str) -> float:
+    text = (first_page_text or "").lower()
+    if "icici" in text:
+        return 1.0
+    if "transaction remarks" in text or any(ICICI_TX_ROW_RE.match(_normalize_pdf_line(line)) for line in text.splitlines()):
+        return 0.6
+    return 0.05  # the catch-all PDF parser
+
+
+def _sniff_icici_csv(first_bytes: bytes, first_page_text: str) -> float:
+    header = next((line for line in (first_page_text or "").splitlines() if line.strip()), "")
+    cells = [c.strip('"\'').lower() for c in re.split(r"[,;|\s]+", header) if c.strip('"\'')]
+    date_col, withdraw_col, deposit_col, desc_col, _ = _csv_columns(cells)
+    if date_col and desc_col and (withdraw_col or deposit_col):
+        return 0.9
+    if date_col and len(cells) >= 2:
+        return 0.5
+    return 0.05  # also the catch-all: it falls back to the text parser itself
+
+
+def _sniff_icici_text(first_bytes: bytes, first_page_text: str) -> float:
+    lines = (first_page_text or "").splitlines()[:200]
+    return 0.4 if any(TEXT_LINE_DATE_RE.match(line.strip()) for line in lines) else 0.0
+
+
+def _parse_icici_csv(file_content, progress=None):
+    return parse_csv(file_content)
+
+
+def _parse_icici_text(file_content, progress=None):
+    with _text_lines(file_content) as lines:
+        return _parse_text_lines_icici(lines)
+
+
+formats.register("icici_pdf", "pdf", _sniff_icici_pdf, parse_pdf)
+formats.register("icici_csv", "text", _sniff_icici_csv, _parse_icici_csv, iter_batches=iter_csv_batches)
+formats.register("icici_text", "text", _sniff_icici_text, _parse_icici_text, iter_batches=_iter_text_batches)
+
+
+def _pdf_first_page_text(source) -> str:
     try:
-        text = io.BytesIO(file_content).read().decode('utf-8', errors='ignore')
+        with pdfplumber.open(_pdf_input(source)) as pdf:
+            if not pdf.pages:
+                return ""
+            page = pdf.pages[0]
+            text = page.extract_text() or ""
+            page.close()
+            return text
     except Exception:
-        text = file_content.decode('latin-1', errors='ignore')
-    return _parse_text_lines_icici(text)
\ No newline at end of file
+        return ""
+
+
+def detect_format(file_content):
+    """Pick the registered format for a statement in one probe: the container from
+    the magic bytes, then each format's sniff() over the first FORMAT_SNIFF_BYTES
+    (and, for PDFs, the first page's text, extracted only if formats compete)."""
+    first_bytes = _read_head(file_content, FORMAT_SNIFF_BYTES)
+    if b"%PDF-" in first_bytes[:1024]:
+        return formats.detect("pdf", first_bytes, lambda: _pdf_first_page_text(file_content))
+    return formats.detect("text", first_bytes, first_bytes.decode('utf-8', errors='ignore'))
+
+
+def parse_statement(file_content, filename: str, progress=None):
+    """Parse a statement from bytes, a path or a seekable binary file with the format
+    detect_format() picks from its content (``filename`` no longer decides).
+    Every parser reads the source directly, so a spooled upload is never loaded into
+    memory whole. ``progress`` reports PDF pages only."""
+    fmt = detect_format(file_content)
+    if fmt is None:
+        print(f"No statement format recognized for {filename}")
+        return []
+    return fmt.parse(file_content, progress=progress)
+
+
+_statement_pool = None
+_statement_pool_lock = threading.Lock()
+# Relays page progress from pool workers back to parse_statement_pooled() callers
+_progress_manager = None
+
+
+def _get_statement_pool():
+    global _statement_pool
+    with _statement_pool_lock:
+        if _statement_pool is None:
+            _statement_pool = ProcessPoolExecutor(max_workers=STATEMENT_PARSE_PROCESSES, initializer=_mark_pool_worker)
+        return _statement_pool
+
+
+def _get_progress_queue():
+    global _progress_manager
+    with _statement_pool_lock:
+        if _progress_manager is None:
+            _progress_manager = multiprocessing.Manager()
+        return _progress_manager.Queue()
+
+
+def shutdown_statement_pool():
+    """Stop the upload parse pool (app shutdown); it is recreated on next use."""
+    global _statement_pool, _progress_manager
+    with _statement_pool_lock:
+        pool, _statement_pool = _statement_pool, None
+        manager, _progress_manager = _progress_manager, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+    if manager is not None:
+        manager.shutdown()
+
+
+def _parse_statement_reporting(file_content, filename: str, progress_queue):
+    """Pool task: parse_statement() posting (pages_done, pages_total) to ``progress_queue``."""
+    return parse_statement(file_content, filename,
+                           progress=lambda done, total: progress_queue.put((done, total)))
+
+
+def parse_statement_pooled(file_content, filename: str, progress=None):
+    """parse_statement() for worker threads (background imports): the parse runs in
+    the shared process pool, so pdfplumber doesn't hold the web process's GIL,
+    while ``progress`` is still called here, in the caller's thread. Falls back to
+    parsing in this thread like parse_statement_async()."""
+    global _statement_pool
+    if STATEMENT_PARSE_PROCESSES <= 0:
+        return parse_statement(file_content, filename, progress=progress)
+    pool = _get_statement_pool()
+    try:
+        if progress is None:
+            return pool.submit(parse_statement, file_content, filename).result()
+        progress_queue = _get_progress_queue()
+        future = pool.submit(_parse_statement_reporting, file_content, filename, progress_queue)
+        while True:
+            try:
+                progress(*progress_queue.get(timeout=0.5))
+            except queue.Empty:
+                if future.done():
+                    break
+        # Updates posted between the last get() and the task finishing
+        while True:
+            try:
+                progress(*progress_queue.get_nowait())
+            except queue.Empty:
+                break
+        return future.result()
+    except BrokenProcessPool as e:
+        print(f"Statement parse pool failed, parsing in a thread: {e}")
+        with _statement_pool_lock:
+            if _statement_pool is pool:
+                _statement_pool = None
+        return parse_statement(file_content, filename, progress=progress)
+
+
+async def parse_statement_async(file_content, filename: str):
+    """parse_statement() for async endpoints: runs in the shared process pool so a
+    long parse never blocks the event loop. At most STATEMENT_PARSE_PROCESSES parses
+    run at once; further uploads queue. A crashed pool is replaced and the parse
+    retried in a thread. Pass a path where possible: only the path is sent to the
+    worker process, not the file's contents."""
+    global _statement_pool
+    loop = asyncio.get_running_loop()
+    if STATEMENT_PARSE_PROCESSES <= 0:
+        return await loop.run_in_executor(None, parse_statement, file_content, filename)
+    pool = _get_statement_pool()
+    try:
+        return await loop.run_in_executor(pool, parse_statement, file_content, filename)
+    except BrokenProcessPool as e:
+        print(f"Statement parse pool failed, parsing in a thread: {e}")
+        with _statement_pool_lock:
+            if _statement_pool is pool:
+                _statement_pool = None
+        return await loop.run_in_executor(None, parse_statement, file_content, filename)
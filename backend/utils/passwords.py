@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from passlib.context import CryptContext
+
+# bcrypt runs in its own small process pool, so a burst of logins can't take
+# the threads (or the GIL) that every other endpoint needs. At most
+# PASSWORD_HASH_MAX_PENDING hashes are running or queued; further requests are
+# turned away with PasswordHashBusy instead of piling up behind them.
+PASSWORD_HASH_PROCESSES = int(os.getenv("PASSWORD_HASH_PROCESSES", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+# Optional lower CPU priority for hash workers. Off by default: on a box with
+# few cores a niced worker only runs when the API is idle, so during a storm
+# every queued login waits out its timeout instead of being hashed
+PASSWORD_HASH_NICE = int(os.getenv("PASSWORD_HASH_NICE", "0"))
+# Latency percentiles are reported over this many recent hashes
+LATENCY_SAMPLES = 1024
+
+logger = logging.getLogger(__name__)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHashBusy(RuntimeError):
+    """PASSWORD_HASH_MAX_PENDING hashes are already running or queued."""
+
+
+def hash_password(password: str) -> str:
+    # bcrypt accepts max 72 bytes; truncate to avoid ValueError
+    return pwd_context.hash(password[:72])
+
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return pwd_context.verify(plain[:72], hashed)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_pending = 0
+_completed = 0
+_rejected = 0
+_fallbacks = 0
+_latencies = deque(maxlen=LATENCY_SAMPLES)
+
+
+def _lower_priority(increment):
+    if increment > 0 and hasattr(os, "nice"):
+        os.nice(increment)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_PROCESSES, initializer=_lower_priority,
+                                        initargs=(PASSWORD_HASH_NICE,))
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the hashing pool (app shutdown); it is recreated on next use."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run(fn, *args):
+    global _pool, _pending, _completed, _rejected, _fallbacks
+    with _stats_lock:
+        if PASSWORD_HASH_MAX_PENDING > 0 and _pending >= PASSWORD_HASH_MAX_PENDING:
+            _rejected += 1
+            raise PasswordHashBusy("Too many sign-in attempts in progress, try again shortly")
+        _pending += 1
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        if PASSWORD_HASH_PROCESSES <= 0:
+            return await loop.run_in_executor(None, fn, *args)
+        pool = _get_pool()
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool as e:
+            # Every request that was on the broken pool lands here; only the
+            # one that discards it logs, the rest are just counted
+            with _pool_lock:
+                discarded = _pool is pool
+                if discarded:
+                    _pool = None
+            with _stats_lock:
+                _fallbacks += 1
+            if discarded:
+                logger.warning(f"Password hash pool failed, hashing in a thread: {e}")
+            return await loop.run_in_executor(None, fn, *args)
+    finally:
+        with _stats_lock:
+            _pending -= 1
+            _completed += 1
+            _latencies.append(time.perf_counter() - start)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password() in the hashing pool. Raises PasswordHashBusy when full."""
+    return await _run(hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    """verify_password() in the hashing pool. Raises PasswordHashBusy when full."""
+    return await _run(verify_password, plain, hashed)
+
+
+def stats() -> dict:
+    """Queue depth and latency (queue wait included) of recent hashes, for /healthz."""
+    with _stats_lock:
+        pending, completed, rejected, fallbacks = _pending, _completed, _rejected, _fallbacks
+        latencies = sorted(_latencies)
+
+    def percentile(p):
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1)
+
+    workers = max(PASSWORD_HASH_PROCESSES, 1)
+    return {
+        "workers": PASSWORD_HASH_PROCESSES,
+        "max_pending": PASSWORD_HASH_MAX_PENDING,
+        "in_flight": min(pending, workers),
+        "queued": max(pending - workers, 0),
+        "completed": completed,
+        "rejected": rejected,
+        "fallbacks": fallbacks,
+        "latency_ms_p50": percentile(0.5),
+        "latency_ms_p99": percentile(0.99),
+    }
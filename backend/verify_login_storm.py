@@ -0,0 +1,104 @@
+"""
+Latency check for API requests during a login storm.
+
+Starts the app under uvicorn against a throwaway SQLite DB and measures GET
+/api/expenses latency on an idle server, then while LOGIN_CLIENTS clients post
+logins back to back (half of them with a wrong password, as in credential
+stuffing). bcrypt runs in its own bounded process pool, so the p99 should stay
+flat and logins beyond the pool's queue limit should be refused quickly with
+503. The script fails if the p99 grows by more than LATENCY_BUDGET_MS, if a
+login gets anything but 200/401/503, if no login succeeds at all, or if the
+503s are slow.
+
+Run from the backend directory: python verify_login_storm.py
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/login_storm.db"
+os.environ.setdefault("PASSWORD_HASH_MAX_PENDING", "8")
+
+import requests
+
+from verify_upload_latency import free_port, start_server, p99, probe
+
+LOGIN_CLIENTS = 12
+STORM_SECONDS = 8
+LATENCY_BUDGET_MS = 150.0
+REJECT_BUDGET_MS = 250.0
+
+
+def login_loop(base, stop, outcomes):
+    session = requests.Session()
+    i = 0
+    while not stop.is_set():
+        password = "password" if i % 2 else "wrong-password"
+        start = time.perf_counter()
+        r = session.post(f"{base}/api/auth/login", json={"email": "storm@test.com", "password": password})
+        outcomes.append((r.status_code, (time.perf_counter() - start) * 1000))
+        i += 1
+
+
+def verify():
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    server, thread = start_server(port)
+    try:
+        token = requests.post(f"{base}/api/auth/signup", json={
+            "name": "Storm", "email": "storm@test.com", "password": "password"
+        }).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        idle = probe(base, headers)
+
+        outcomes = []
+        stop = threading.Event()
+        clients = [threading.Thread(target=login_loop, args=(base, stop, outcomes)) for _ in range(LOGIN_CLIENTS)]
+        loaded = []
+        probe_stop = threading.Event()
+        prober = threading.Thread(target=lambda: loaded.extend(probe(base, headers, probe_stop)))
+        for t in clients:
+            t.start()
+        time.sleep(0.5)  # let the storm fill the hashing queue
+        prober.start()
+        time.sleep(STORM_SECONDS)
+        probe_stop.set()
+        prober.join()
+        stop.set()
+        for t in clients:
+            t.join()
+        hashing = requests.get(f"{base}/healthz").json()["password_hashing"]
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    by_status = {}
+    for status_code, ms in outcomes:
+        by_status.setdefault(status_code, []).append(ms)
+    print(f"{len(outcomes)} logins from {LOGIN_CLIENTS} clients: " +
+          ", ".join(f"{code}: {len(v)} (p99 {p99(v):.0f} ms)" for code, v in sorted(by_status.items())))
+    print(f"hashing pool: {hashing}")
+    print(f"idle:  p50 {sorted(idle)[len(idle) // 2]:.1f} ms  p99 {p99(idle):.1f} ms  ({len(idle)} requests)")
+    print(f"storm: p50 {sorted(loaded)[len(loaded) // 2]:.1f} ms  p99 {p99(loaded):.1f} ms  max {max(loaded):.1f} ms  ({len(loaded)} requests)")
+
+    unexpected = set(by_status) - {200, 401, 503}
+    if unexpected:
+        print(f"FAIL: unexpected login status codes {sorted(unexpected)}")
+        sys.exit(1)
+    if not by_status.get(200):
+        print("FAIL: no login succeeded during the storm; the hashing pool is starved")
+        sys.exit(1)
+    if 503 in by_status and p99(by_status[503]) > REJECT_BUDGET_MS:
+        print(f"FAIL: rejected logins took {p99(by_status[503]):.0f} ms (p99), budget {REJECT_BUDGET_MS:.0f} ms")
+        sys.exit(1)
+    growth = p99(loaded) - p99(idle)
+    if growth > LATENCY_BUDGET_MS:
+        print(f"FAIL: p99 grew by {growth:.1f} ms during the login storm (budget {LATENCY_BUDGET_MS:.0f} ms)")
+        sys.exit(1)
+    print(f"PASS: p99 grew by {growth:.1f} ms during the login storm (budget {LATENCY_BUDGET_MS:.0f} ms)")
+
+if __name__ == "__main__":
+    verify()
@@ -0,0 +1,59 @@
+"""
+Memory check for PDF statement parsing.
+
+Parses synthetic ICICI statements of increasing length, each in a fresh
+subprocess, and records how far peak RSS rises above the process's RSS just
+before parse_pdf runs. Pages are released as soon as they are extracted, so
+the rise should not depend on page count. The script fails if the longest
+statement's rise exceeds the shortest's by more than TOLERANCE_MB.
+
+Run from the backend directory: python verify_pdf_memory.py
+"""
+import resource
+import subprocess
+import sys
+import tempfile
+
+PAGE_COUNTS = (20, 80, 200)
+TOLERANCE_MB = 25
+ROWS_PER_PAGE = 15
+
+
+def measure(num_pages):
+    """Child process: parse a `num_pages` statement from a temp file and print the peak RSS rise in KB."""
+    from benchmarks.synthetic import make_icici_pdf
+    from utils import parser
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as f:
+        f.write(make_icici_pdf(num_pages, rows_per_page=ROWS_PER_PAGE))
+        f.flush()
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        transactions = parser.parse_pdf(f.name, workers=1)
+        after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(len(transactions), after - before)
+
+
+def verify():
+    growth = {}
+    for num_pages in PAGE_COUNTS:
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", str(num_pages)],
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+        transactions, rise_kb = int(out[-2]), int(out[-1])
+        if transactions != num_pages * ROWS_PER_PAGE:
+            print(f"FAIL: {num_pages} pages gave {transactions} transactions, expected {num_pages * ROWS_PER_PAGE}")
+            sys.exit(1)
+        growth[num_pages] = rise_kb / 1024
+        print(f"{num_pages:>4} pages: {transactions:>5} transactions, peak RSS +{growth[num_pages]:.1f} MB")
+
+    spread = growth[PAGE_COUNTS[-1]] - growth[PAGE_COUNTS[0]]
+    if spread > TOLERANCE_MB:
+        print(f"FAIL: peak memory grows with page count (+{spread:.1f} MB from {PAGE_COUNTS[0]} to {PAGE_COUNTS[-1]} pages)")
+        sys.exit(1)
+    print(f"PASS: peak memory flat across page counts (+{spread:.1f} MB from {PAGE_COUNTS[0]} to {PAGE_COUNTS[-1]} pages, tolerance {TOLERANCE_MB} MB)")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        measure(int(sys.argv[2]))
+    else:
+        verify()
@@ -0,0 +1,135 @@
+"""
+Query-plan regression check for the expense read paths.
+
+Runs every filter/sort combination GET /api/expenses accepts (page and cursor
+mode), plus summary, rollups, recurring detection and auto-tagging, against a seeded
+in-memory SQLite DB. Each SELECT that touches `expenses` is re-run under
+EXPLAIN QUERY PLAN, and the script fails if any of them scans the whole table
+instead of searching an index.
+
+Run from the backend directory: python verify_query_plans.py
+"""
+import itertools
+import re
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from database import Base
+import models, crud, search
+from routers import summary
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+SORTS = ["date", "amount", "created_at", "description", "relevance"]
+ORDERS = ["asc", "desc"]
+FILTERS = {
+    "none": {},
+    "q": {"q": "swiggy"},
+    "status": {"status": models.ExpenseStatus.PENDING},
+    "source": {"source": "ICICI PDF"},
+    "amount_range": {"min_amount": 10.0, "max_amount": 500.0},
+    "date_range": {"from_date": datetime(2025, 2, 1), "to_date": datetime(2025, 3, 1)},
+    "category": {"category_id": 1},
+    "recurring": {"is_recurring": True},
+}
+
+# "SCAN expenses" / "SCAN TABLE expenses" (older SQLite), optionally "USING INDEX" —
+# either way every row of the table is visited.
+FULL_SCAN_RE = re.compile(r"^SCAN (TABLE )?expenses\b")
+
+captured = []
+
+@event.listens_for(engine, "before_cursor_execute")
+def capture(conn, cursor, statement, parameters, context, executemany):
+    # detect_recurring_expenses updates flags by merchant_key and by id
+    if statement.lstrip().upper().startswith(("SELECT", "UPDATE")) and "expenses" in statement:
+        # executemany: one parameter set is enough to plan the statement
+        captured.append((statement, parameters[0] if executemany else parameters))
+
+
+def seed(db):
+    user = models.User(email="plans@test.com", name="Plans")
+    other = models.User(email="other@test.com", name="Other")
+    db.add_all([user, other])
+    db.commit()
+    cat = models.Category(name="Food", user_id=user.id)
+    db.add(cat)
+    db.commit()
+    db.add(models.AutoTagRule(keyword="swiggy", category_id=cat.id, user_id=user.id))
+    start = datetime(2025, 1, 1)
+    for owner in (user, other):
+        for i in range(2000):
+            db.add(models.Expense(
+                date=start + timedelta(days=i % 120),
+                description=f"UPI/{'SWIGGY' if i % 7 == 0 else 'MERCHANT'}{i % 50}/ref{i}",
+                amount=float(i % 900) - 100,
+                source="ICICI PDF" if i % 2 else "ICICI CSV",
+                transaction_hash=f"{owner.id}-{i}",
+                user_id=owner.id,
+                category_id=cat.id if owner is user and i % 3 == 0 else None,
+                is_recurring=i % 11 == 0,
+            ))
+    db.commit()
+    return user
+
+
+def run_read_paths(db, user):
+    cases = []
+    for (name, filters), sort_by, order in itertools.product(FILTERS.items(), SORTS, ORDERS):
+        label = f"filter={name} sort={sort_by} order={order}"
+        kwargs = dict(filters, sort_by=sort_by, order=order, user_id=user.id)
+        cases.append((f"page   {label}", lambda kw=kwargs: crud.get_expenses_paginated(db, page=3, per_page=20, **kw)))
+        def keyset(kw=kwargs):
+            first = crud.get_expenses_keyset(db, per_page=20, include_total=True, **kw)
+            if first["next_cursor"]:
+                crud.get_expenses_keyset(db, cursor=first["next_cursor"], per_page=20, **kw)
+        cases.append((f"cursor {label}", keyset))
+    cases.append(("summary", lambda: summary.get_summary(db=db, current_user=user)))
+    cases.append(("rollups", lambda: crud.get_rollups(db, user_id=user.id, from_month="2025-02", to_month="2025-03")))
+    cases.append(("detect_recurring", lambda: crud.detect_recurring_expenses(db, user_id=user.id)))
+    cases.append(("apply_auto_tags", lambda: crud.apply_auto_tags_to_all(db, user_id=user.id)))
+    return cases
+
+
+def explain(db, statement, parameters):
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[3] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def verify():
+    Base.metadata.create_all(bind=engine)
+    search.ensure_search_backend(engine)
+    db = TestingSessionLocal()
+    user = seed(db)
+
+    failures = 0
+    checked = 0
+    for label, run in run_read_paths(db, user):
+        captured.clear()
+        run()
+        db.rollback()
+        for statement, parameters in captured:
+            checked += 1
+            plan = explain(db, statement, parameters)
+            scans = [step for step in plan if FULL_SCAN_RE.match(step)]
+            if scans:
+                failures += 1
+                print(f"FAIL: {label}: {'; '.join(scans)}")
+                print(f"      {' '.join(statement.split())[:200]}")
+
+    db.close()
+    if failures:
+        print(f"FAIL: {failures} of {checked} queries fall back to a full scan of expenses")
+        sys.exit(1)
+    print(f"PASS: all {checked} expense queries use an index")
+
+if __name__ == "__main__":
+    verify()
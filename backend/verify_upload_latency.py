@@ -0,0 +1,131 @@
+"""
+Latency check for statement uploads.
+
+Starts the app under uvicorn against a throwaway SQLite DB and measures GET
+latency (/healthz and /api/expenses) twice: on an idle server, then while
+several clients upload the sample PDF statement back to back. Parsing happens
+off the event loop, so the p99 latency under upload load should stay flat.
+The script fails if it grows by more than LATENCY_BUDGET_MS.
+
+Run from the backend directory: python verify_upload_latency.py
+"""
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/latency.db"
+# Every upload is the same file; keep the parse cache out so each one really parses
+os.environ["PARSE_CACHE_MAX_BYTES"] = "0"
+
+import requests
+import uvicorn
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "OpTransactionHistory22-04-2026.pdf-22-38-39.pdf")
+UPLOAD_CLIENTS = 3
+UPLOADS_PER_CLIENT = 4
+PROBES = 200
+LATENCY_BUDGET_MS = 150.0
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port):
+    import main
+    config = uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if server.started:
+            return server, thread
+        time.sleep(0.05)
+    raise RuntimeError("uvicorn did not start")
+
+
+def p99(samples):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+
+def probe(base, headers, stop=None):
+    """Alternate GET /healthz and GET /api/expenses; return latencies in ms."""
+    latencies = []
+    session = requests.Session()
+    i = 0
+    while (stop is None and i < PROBES) or (stop is not None and not stop.is_set()):
+        url = f"{base}/healthz" if i % 2 else f"{base}/api/expenses/?per_page=20"
+        start = time.perf_counter()
+        session.get(url, headers=headers).raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+        time.sleep(0.005)
+    return latencies
+
+
+def upload_loop(base, headers, content, errors):
+    session = requests.Session()
+    for _ in range(UPLOADS_PER_CLIENT):
+        r = session.post(f"{base}/api/statements/upload", headers=headers,
+                         files={"file": ("statement.pdf", content, "application/pdf")})
+        if r.status_code != 200:
+            errors.append(r.text)
+
+
+def verify():
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    server, thread = start_server(port)
+    try:
+        token = requests.post(f"{base}/api/auth/signup", json={
+            "name": "Latency", "email": "latency@test.com", "password": "password"
+        }).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        with open(SAMPLE_PDF, "rb") as f:
+            content = f.read()
+        # Warm up the parse pool so process start-up isn't counted
+        requests.post(f"{base}/api/statements/upload", headers=headers,
+                      files={"file": ("statement.pdf", content, "application/pdf")}).raise_for_status()
+
+        idle = probe(base, headers)
+
+        errors = []
+        uploaders = [threading.Thread(target=upload_loop, args=(base, headers, content, errors))
+                     for _ in range(UPLOAD_CLIENTS)]
+        stop = threading.Event()
+        loaded = []
+        prober = threading.Thread(target=lambda: loaded.extend(probe(base, headers, stop)))
+        start = time.perf_counter()
+        prober.start()
+        for t in uploaders:
+            t.start()
+        for t in uploaders:
+            t.join()
+        stop.set()
+        prober.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    print(f"{UPLOAD_CLIENTS * UPLOADS_PER_CLIENT} uploads in {elapsed:.1f}s")
+    print(f"idle:    p50 {sorted(idle)[len(idle) // 2]:.1f} ms  p99 {p99(idle):.1f} ms  ({len(idle)} requests)")
+    print(f"uploads: p50 {sorted(loaded)[len(loaded) // 2]:.1f} ms  p99 {p99(loaded):.1f} ms  max {max(loaded):.1f} ms  ({len(loaded)} requests)")
+    if errors:
+        print(f"FAIL: {len(errors)} uploads failed: {errors[0][:200]}")
+        sys.exit(1)
+    growth = p99(loaded) - p99(idle)
+    if growth > LATENCY_BUDGET_MS:
+        print(f"FAIL: p99 grew by {growth:.1f} ms during uploads (budget {LATENCY_BUDGET_MS:.0f} ms)")
+        sys.exit(1)
+    print(f"PASS: p99 grew by {growth:.1f} ms during uploads (budget {LATENCY_BUDGET_MS:.0f} ms)")
+
+if __name__ == "__main__":
+    verify()
@@ -30,10 +30,11 @@ export interface Expense {
 
 export interface PaginatedExpenses {
     items: Expense[];
-    total: number;
-    page: number;
-    pages: number;
+    total: number | null;        // null when include_total=false
+    page: number | null;         // null in cursor mode
+    pages: number | null;        // null in cursor mode or without a total
     per_page: number;
+    next_cursor: string | null;  // cursor mode only; null on the last page
 }
 
 export interface Reimbursement {
@@ -57,6 +58,23 @@ export interface UploadSummary {
     existing: number;
     new_added: number;
     auto_tagged?: number;
+    duplicate_of?: number | null;
+}
+
+export interface StatementJob {
+    id: number;
+    file_name: string;
+    status: 'QUEUED' | 'RUNNING' | 'DONE' | 'FAILED';
+    uploaded_at: string;
+    started_at: string | null;
+    finished_at: string | null;
+    pages_done: number | null;
+    pages_total: number | null;
+    num_transactions_imported: number | null;
+    existing_count: number | null;
+    auto_tagged_count: number | null;
+    error: string | null;
+    content_sha256: string | null;
 }
 
 export interface Summary {
@@ -66,6 +84,23 @@ export interface Summary {
     last_reimbursement_date: string | null;
 }
 
+export interface RollupRow {
+    month?: string | null;
+    category_id?: number | null;
+    category_name?: string | null;
+    debit: number;
+    credit: number;
+    reimbursed: number;
+    count: number;
+}
+
+export interface AnalyticsRollups {
+    group_by: 'month' | 'category' | 'month_category';
+    from_month: string | null;
+    to_month: string | null;
+    rows: RollupRow[];
+}
+
 export interface Category {
     id: number;
     name: string;
@@ -103,6 +138,27 @@ export const uploadStatement = async (file: File) => {
     return response.data;
 };
 
+// Queue the file as a background import job; poll getStatementJob for progress
+export const uploadStatementInBackground = async (file: File) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    const response = await client.post<StatementJob>('/statements/upload', formData, {
+        params: { background: true },
+        headers: { 'Content-Type': 'multipart/form-data' },
+    });
+    return response.data;
+};
+
+export const getStatementJob = async (id: number) => {
+    const response = await client.get<StatementJob>(`/statements/jobs/${id}`);
+    return response.data;
+};
+
+export const getStatementJobs = async () => {
+    const response = await client.get<StatementJob[]>('/statements/jobs');
+    return asArray(response.data);
+};
+
 // ──────────────────────────────────────
 // EXPENSES
 // ──────────────────────────────────────
@@ -117,10 +173,12 @@ export interface ExpenseFilters {
     max_amount?: number;
     from_date?: string;
     to_date?: string;
-    sort_by?: 'date' | 'amount' | 'created_at' | 'description';
+    sort_by?: 'date' | 'amount' | 'created_at' | 'description' | 'relevance';
     order?: 'asc' | 'desc';
     category_id?: number;
     is_recurring?: boolean;
+    cursor?: string;
+    include_total?: boolean;
 }
 
 export const getExpenses = async (params?: ExpenseFilters) => {
@@ -213,6 +271,17 @@ export const getSummary = async () => {
     return response.data;
 };
 
+export const getRollups = async (params?: {
+    from_month?: string;
+    to_month?: string;
+    group_by?: 'month' | 'category' | 'month_category';
+    source?: string;
+    category_id?: number;
+}) => {
+    const response = await client.get<AnalyticsRollups>('/analytics/rollups', { params });
+    return response.data;
+};
+
 // ──────────────────────────────────────
 // CATEGORIES
 // ──────────────────────────────────────
@@ -110,8 +110,9 @@ const ExpenseList: React.FC = () => {
         getExpenses(buildFilters())
             .then((data: PaginatedExpenses) => {
                 setExpenses(Array.isArray(data.items) ? data.items : []);
-                setTotal(data.total);
-                setTotalPages(data.pages);
+                // Always set in page mode with the total included; null otherwise
+                setTotal(data.total ?? data.items.length);
+                setTotalPages(data.pages ?? 1);
             })
             .finally(() => setLoading(false));
     }, [buildFilters]);